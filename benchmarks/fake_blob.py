@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+In-memory stand-in for the parts of azure.storage.blob that SharePointSync uses.
+
+Keeps blob sizes and metadata (not content, unless keep_data is set) so
+100k-file runs fit in memory, counts every operation like a storage account
+bills transactions, and can add a fixed latency per call.
+"""
+
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+from azure.core.exceptions import ResourceNotFoundError
+
+
+@dataclass
+class FakeBlob:
+    size: int
+    metadata: Dict[str, str] = field(default_factory=dict)
+    data: Optional[bytes] = None
+
+
+@dataclass
+class FakeBlobProperties:
+    name: str
+    size: int
+    metadata: Dict[str, str]
+
+
+@dataclass
+class FakeBlobListing:
+    name: str
+    size: int
+    metadata: Optional[Dict[str, str]] = None
+
+
+@dataclass
+class FakeBatchResponse:
+    status_code: int
+
+
+class FakeBlobServiceClient:
+    """Drop-in for BlobServiceClient as passed to SharePointSync(blob_service_client=...)."""
+
+    def __init__(self, latency_ms: float = 0, keep_data: bool = False):
+        self.latency = latency_ms / 1000
+        self.keep_data = keep_data
+        self.containers: Dict[str, Dict[str, FakeBlob]] = {}
+        self.staged: Dict[tuple, Dict[str, bytes]] = {}
+        self._lock = threading.Lock()
+        self.counters: Dict[str, int] = {
+            "put_blob": 0, "put_block": 0, "put_block_list": 0, "get_properties": 0,
+            "set_metadata": 0, "delete": 0, "list": 0, "bytes_uploaded": 0,
+        }
+
+    def _call(self, name: str, uploaded: int = 0) -> None:
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.counters[name] += 1
+            self.counters["bytes_uploaded"] += uploaded
+
+    def get_container_client(self, container: str) -> "FakeContainerClient":
+        return FakeContainerClient(self, container)
+
+    def get_blob_client(self, container: str, blob: str) -> "FakeBlobClient":
+        return FakeBlobClient(self, container, blob)
+
+    def blob_count(self) -> int:
+        with self._lock:
+            return sum(len(blobs) for blobs in self.containers.values())
+
+
+class FakeContainerClient:
+    def __init__(self, service: FakeBlobServiceClient, container: str):
+        self.service = service
+        self.container = container
+
+    def get_container_properties(self) -> Dict[str, Any]:
+        self.service._call("get_properties")
+        return {"name": self.container}
+
+    def list_blobs(self, name_starts_with: Optional[str] = None, include: Optional[List[str]] = None,
+                   **kwargs) -> List[FakeBlobListing]:
+        with_metadata = "metadata" in (include or [])
+        with self.service._lock:
+            blobs = self.service.containers.get(self.container, {})
+            listing = [FakeBlobListing(name, blob.size, dict(blob.metadata) if with_metadata else None)
+                       for name, blob in sorted(blobs.items()) if name.startswith(name_starts_with or "")]
+        # List Blobs returns at most 5000 blobs per call
+        for _ in range(max(1, -(-len(listing) // 5000))):
+            self.service._call("list")
+        return listing
+
+    def delete_blobs(self, *blob_names: str, **kwargs) -> List[FakeBatchResponse]:
+        self.service._call("delete")
+        responses = []
+        with self.service._lock:
+            blobs = self.service.containers.setdefault(self.container, {})
+            for name in blob_names:
+                responses.append(FakeBatchResponse(202 if blobs.pop(name, None) else 404))
+        return responses
+
+
+class FakeBlobClient:
+    def __init__(self, service: FakeBlobServiceClient, container: str, blob: str):
+        self.service = service
+        self.container = container
+        self.blob_name = blob
+
+    def _store(self, blob: FakeBlob) -> None:
+        with self.service._lock:
+            self.service.containers.setdefault(self.container, {})[self.blob_name] = blob
+
+    def upload_blob(self, data: bytes, overwrite: bool = False, metadata: Optional[Dict[str, str]] = None,
+                    **kwargs) -> Dict[str, Any]:
+        self.service._call("put_blob", len(data))
+        self._store(FakeBlob(len(data), dict(metadata or {}), bytes(data) if self.service.keep_data else None))
+        return {}
+
+    def stage_block(self, block_id: str, data: bytes, **kwargs) -> None:
+        self.service._call("put_block", len(data))
+        with self.service._lock:
+            blocks = self.service.staged.setdefault((self.container, self.blob_name), {})
+            blocks[block_id] = bytes(data) if self.service.keep_data else len(data)
+
+    def commit_block_list(self, block_list: List[Any], metadata: Optional[Dict[str, str]] = None,
+                          **kwargs) -> Dict[str, Any]:
+        self.service._call("put_block_list")
+        with self.service._lock:
+            staged = self.service.staged.pop((self.container, self.blob_name), {})
+        parts = [staged[block.id if hasattr(block, "id") else block.block_id] for block in block_list]
+        if self.service.keep_data:
+            data = b"".join(parts)
+            blob = FakeBlob(len(data), dict(metadata or {}), data)
+        else:
+            blob = FakeBlob(sum(parts), dict(metadata or {}))
+        self._store(blob)
+        return {}
+
+    def get_blob_properties(self, **kwargs) -> FakeBlobProperties:
+        self.service._call("get_properties")
+        with self.service._lock:
+            blob = self.service.containers.get(self.container, {}).get(self.blob_name)
+        if blob is None:
+            raise ResourceNotFoundError(f"Blob {self.blob_name} not found")
+        return FakeBlobProperties(self.blob_name, blob.size, dict(blob.metadata))
+
+    def set_blob_metadata(self, metadata: Optional[Dict[str, str]] = None, **kwargs) -> Dict[str, Any]:
+        self.service._call("set_metadata")
+        with self.service._lock:
+            blob = self.service.containers.get(self.container, {}).get(self.blob_name)
+            if blob is None:
+                raise ResourceNotFoundError(f"Blob {self.blob_name} not found")
+            blob.metadata = dict(metadata or {})
+        return {}
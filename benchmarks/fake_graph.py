@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+In-process fake of the Microsoft Graph endpoints used by sync.
+
+Serves a synthetic document library over plain HTTP on localhost:
+- GET .../delta                     delta pages of page_size items with @odata.nextLink/@odata.deltaLink
+                                    (410 resyncRequired for an unknown token)
+- GET /drives/{d}/items/{id}/content  302 to /download/{id}, like Graph's pre-authenticated redirect
+- GET /download/{id}                file bytes, honoring Range (206 + Content-Range) and If-Match
+- GET /drives/{d}/items/{id}        the driveItem JSON
+- GET /sites/{s}/drive              the site's default drive (the library's DRIVE_ID)
+- POST /$batch                      GET sub-requests answered from the library
+
+Every request can be delayed (latency_ms) and randomly answered with
+429 + Retry-After (throttle_rate), and per-endpoint request counts are kept.
+"""
+
+import json
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+API_PREFIX = "/v1.0"
+DRIVE_ID = "b!benchmark-drive"
+SITE_ID = "benchmark.sharepoint.com,benchmark-site,benchmark-web"
+
+# Extension mix of a typical document library (weights are relative)
+EXTENSION_WEIGHTS = {
+    ".pdf": 30, ".docx": 25, ".pptx": 10, ".xlsx": 10, ".txt": 5,
+    ".md": 5, ".png": 8, ".jpg": 5, ".mp4": 2,
+}
+
+# Content is a repeating 64KB pattern so any byte range can be served without storing files
+_PATTERN = bytes(range(256)) * 256
+
+
+def build_library(num_files: int, avg_size_kb: int = 256, files_per_folder: int = 500,
+                  duplicate_ratio: float = 0.0, seed: int = 0) -> List[Dict[str, Any]]:
+    """
+    Generate driveItems for a synthetic library.
+
+    Sizes follow an exponential distribution around avg_size_kb (capped at 50x the
+    average) so most files are small and a few are large. duplicate_ratio of the
+    files reuse the quickXorHash of an earlier file, for the dedup path.
+    """
+    rng = random.Random(seed)
+    extensions = list(EXTENSION_WEIGHTS)
+    weights = list(EXTENSION_WEIGHTS.values())
+    avg_size = avg_size_kb * 1024
+    items = []
+    for index in range(num_files):
+        folder = f"Folder{index // files_per_folder:04d}"
+        ext = rng.choices(extensions, weights)[0]
+        size = max(1, min(int(rng.expovariate(1 / avg_size)), avg_size * 50))
+        content_hash = f"hash{index:08d}"
+        if items and rng.random() < duplicate_ratio:
+            original = items[rng.randrange(len(items))]
+            size = original["size"]
+            content_hash = original["file"]["hashes"]["quickXorHash"]
+        item_id = f"item{index:08d}"
+        items.append({
+            "id": item_id,
+            "name": f"document-{index:08d}{ext}",
+            "size": size,
+            "eTag": f"\"{{{item_id}}},1\"",
+            "cTag": f"\"c:{{{item_id}}},1\"",
+            "webUrl": f"https://benchmark.sharepoint.com/Shared%20Documents/Bench/{folder}/document-{index:08d}{ext}",
+            "lastModifiedDateTime": "2024-01-01T00:00:00Z",
+            "file": {"mimeType": "application/octet-stream", "hashes": {"quickXorHash": content_hash}},
+            "parentReference": {"driveId": DRIVE_ID, "path": f"/drives/{DRIVE_ID}/root:/Bench/{folder}"},
+        })
+    return items
+
+
+class _GraphHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Keep-alive sockets the client drops at shutdown are expected, not errors
+        if isinstance(sys.exc_info()[1], (ConnectionResetError, BrokenPipeError)):
+            return
+        super().handle_error(request, client_address)
+
+
+class FakeGraphServer:
+    """Threaded HTTP server answering Graph requests from a synthetic library."""
+
+    def __init__(self, items: List[Dict[str, Any]], page_size: int = 200, latency_ms: float = 0,
+                 throttle_rate: float = 0.0, retry_after: int = 1, seed: int = 0):
+        self.items = items
+        self.items_by_id = {item["id"]: item for item in items}
+        self.page_size = page_size
+        self.latency = latency_ms / 1000
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.counters: Dict[str, int] = {
+            "requests": 0, "delta_pages": 0, "content_redirects": 0, "downloads": 0,
+            "range_downloads": 0, "item_gets": 0, "batch_requests": 0, "throttled": 0,
+            "bytes_served": 0,
+        }
+        self._server: Optional[_GraphHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}{API_PREFIX}"
+
+    def start(self) -> "FakeGraphServer":
+        fake = self
+
+        class Handler(GraphRequestHandler):
+            server_state = fake
+
+        self._server = _GraphHTTPServer(("127.0.0.1", 0), Handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-graph", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def count(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self.counters[name] += amount
+
+    def should_throttle(self) -> bool:
+        if not self.throttle_rate:
+            return False
+        with self._lock:
+            return self._rng.random() < self.throttle_rate
+
+    def delta_page(self, path: str, query: Dict[str, List[str]]) -> Dict[str, Any]:
+        """Page N of the full enumeration; a delta link query returns no changes."""
+        base = f"{self.base_url}{path[len(API_PREFIX):]}"
+        if "token" in query:
+            return {"value": [], "@odata.deltaLink": f"{base}?token=latest"}
+        page = int(query.get("page", ["0"])[0])
+        start = page * self.page_size
+        page_data: Dict[str, Any] = {"value": self.items[start:start + self.page_size]}
+        if start + self.page_size < len(self.items):
+            page_data["@odata.nextLink"] = f"{base}?page={page + 1}"
+        else:
+            page_data["@odata.deltaLink"] = f"{base}?token=latest"
+        return page_data
+
+
+class GraphRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_state: FakeGraphServer = None
+
+    ITEM_PATH = re.compile(r"^/v1\.0/drives/[^/]+/items/([^/?]+)(/content)?$")
+    DOWNLOAD_PATH = re.compile(r"^/download/([^/?]+)$")
+    SITE_DRIVE_PATH = re.compile(r"^/v1\.0/sites/[^/]+/drive$")
+
+    def log_message(self, format, *args):
+        pass
+
+    def _begin(self) -> bool:
+        """Count the request, apply latency and maybe throttle it. Returns False if throttled."""
+        state = self.server_state
+        state.count("requests")
+        if state.latency:
+            time.sleep(state.latency)
+        if state.should_throttle():
+            state.count("throttled")
+            self._send_json(429, {"error": {"code": "TooManyRequests"}}, {"Retry-After": str(state.retry_after)})
+            return False
+        return True
+
+    def _send_json(self, status: int, body: Any, headers: Optional[Dict[str, str]] = None) -> None:
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        if not self._begin():
+            return
+        state = self.server_state
+        url = urlparse(self.path)
+
+        if url.path.endswith("/delta"):
+            state.count("delta_pages")
+            if parse_qs(url.query).get("token", ["latest"]) != ["latest"]:
+                # Only the current token is known; anything else has expired
+                self._send_json(410, {"error": {"code": "resyncRequired", "message": "Resync required"}})
+                return
+            self._send_json(200, state.delta_page(url.path, parse_qs(url.query)))
+            return
+
+        match = self.ITEM_PATH.match(url.path)
+        if match:
+            item = state.items_by_id.get(match.group(1))
+            if not item:
+                self._send_json(404, {"error": {"code": "itemNotFound"}})
+            elif match.group(2):
+                state.count("content_redirects")
+                self.send_response(302)
+                self.send_header("Location", f"/download/{item['id']}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+            else:
+                state.count("item_gets")
+                self._send_json(200, dict(item, sharepointIds=self._sharepoint_ids(item)))
+            return
+
+        if self.SITE_DRIVE_PATH.match(url.path):
+            self._send_json(200, {"id": DRIVE_ID})
+            return
+
+        match = self.DOWNLOAD_PATH.match(url.path)
+        if match and match.group(1) in state.items_by_id:
+            self._send_content(state.items_by_id[match.group(1)])
+            return
+
+        self._send_json(404, {"error": {"code": "notFound", "message": url.path}})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        if not self._begin():
+            return
+        state = self.server_state
+        if urlparse(self.path).path != f"{API_PREFIX}/$batch":
+            self._send_json(404, {"error": {"code": "notFound"}})
+            return
+
+        state.count("batch_requests")
+        responses = []
+        for sub in body.get("requests", []):
+            sub_url = urlparse(sub["url"])
+            match = self.ITEM_PATH.match(f"{API_PREFIX}{sub_url.path}")
+            item = state.items_by_id.get(match.group(1)) if match else None
+            if item:
+                item_body = dict(item, sharepointIds=self._sharepoint_ids(item))
+                select = parse_qs(sub_url.query).get("$select")
+                if select:
+                    item_body = {key: value for key, value in item_body.items() if key in select[0].split(",")}
+                responses.append({"id": sub["id"], "status": 200, "body": item_body})
+            else:
+                responses.append({"id": sub["id"], "status": 404, "body": {"error": {"code": "itemNotFound"}}})
+        self._send_json(200, {"responses": responses})
+
+    @staticmethod
+    def _sharepoint_ids(item: Dict[str, Any]) -> Dict[str, str]:
+        return {"siteId": "benchmark-site", "listId": "benchmark-list", "listItemId": item["id"][4:]}
+
+    def _send_content(self, item: Dict[str, Any]) -> None:
+        state = self.server_state
+        size = item["size"]
+        start, end = 0, size - 1
+        if_match = self.headers.get("If-Match")
+        if if_match and if_match != item["eTag"]:
+            self._send_json(412, {"error": {"code": "preconditionFailed"}})
+            return
+        range_match = re.match(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+        if range_match:
+            start = int(range_match.group(1))
+            end = min(int(range_match.group(2)), size - 1) if range_match.group(2) else size - 1
+            if start >= size:
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{size}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            state.count("range_downloads")
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        else:
+            state.count("downloads")
+            self.send_response(200)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(end - start + 1))
+        self.send_header("ETag", item["eTag"])
+        self.end_headers()
+
+        position = start
+        while position <= end:
+            offset = position % len(_PATTERN)
+            chunk = _PATTERN[offset:offset + min(len(_PATTERN) - offset, end - position + 1)]
+            self.wfile.write(chunk)
+            position += len(chunk)
+        state.count("bytes_served", end - start + 1)
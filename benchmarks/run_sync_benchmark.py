@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+End-to-end sync benchmark against a fake Graph server and an in-memory blob store.
+
+Drives SharePointSync.sync_sharepoint_folder over synthetic libraries and reports
+files/s, MB/s, peak RSS and request counts, so concurrency/streaming changes can
+be compared without a tenant or network access. Each library size runs in its
+own process so peak RSS is not carried over between runs.
+
+Usage:
+    python benchmarks/run_sync_benchmark.py --files 1000 --files 10000 --files 100000
+    python benchmarks/run_sync_benchmark.py --files 1000 --concurrency 16 --latency-ms 20 --throttle-rate 0.02
+    python benchmarks/run_sync_benchmark.py --files 10000 --json-out results.json
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import resource
+import tempfile
+import multiprocessing
+from typing import Any, Dict, List
+import click
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+
+def run_scenario(scenario: Dict[str, Any]) -> Dict[str, Any]:
+    """Build the library, point sync at the fakes and run one full sync. Runs in a child process."""
+    from config.settings import config
+    from src.sharepoint_sync import SharePointSync
+    from benchmarks.fake_graph import FakeGraphServer, build_library, DRIVE_ID, SITE_ID
+    from benchmarks.fake_blob import FakeBlobServiceClient
+
+    # src.sharepoint_sync configures INFO logging on import; quiet it unless asked
+    logging.getLogger().setLevel(logging.INFO if scenario["verbose"] else logging.WARNING)
+
+    items = build_library(scenario["files"], scenario["avg_size_kb"],
+                          duplicate_ratio=scenario["duplicate_ratio"], seed=scenario["seed"])
+    graph = FakeGraphServer(items, page_size=scenario["page_size"], latency_ms=scenario["latency_ms"],
+                            throttle_rate=scenario["throttle_rate"], seed=scenario["seed"]).start()
+    blobs = FakeBlobServiceClient(latency_ms=scenario["storage_latency_ms"])
+
+    with tempfile.TemporaryDirectory(prefix="sync-bench-") as workdir:
+        # Everything sync reads from config, pointed at the fakes and a throwaway state store
+        config.graph_base_url = graph.base_url
+        config.tenant_id = config.tenant_id or "benchmark-tenant"
+        config.client_id = config.client_id or "benchmark-client"
+        config.site_id = SITE_ID
+        config.drive_id = DRIVE_ID
+        config.folder_path = "Bench"
+        config.az_storage_url = "https://benchmark.blob.core.windows.net"
+        config.az_container = "benchmark"
+        config.sync_state_db = os.path.join(workdir, "sync_state.db")
+        config.delta_state_file = os.path.join(workdir, "delta_state.json")
+        config.token_cache_file = ""
+        config.token_refresh_lead_seconds = 0
+        config.sync_server_side_copy = False
+        config.sync_dedup_content = scenario["duplicate_ratio"] > 0
+        config.graph_rate_limit = config.graph_rate_limit_max = scenario["graph_rate"]
+        config.storage_rate_limit = config.storage_rate_limit_max = scenario["storage_rate"]
+
+        class BenchmarkSync(SharePointSync):
+            def _acquire_token(self) -> str:
+                return "benchmark-token"
+
+        sp_sync = BenchmarkSync(blob_service_client=blobs)
+        try:
+            started = time.perf_counter()
+            summary = sp_sync.sync_sharepoint_folder(concurrency=scenario["concurrency"])
+            elapsed = time.perf_counter() - started
+        finally:
+            sp_sync.close()
+            graph.stop()
+
+    total_bytes = sum(item["size"] for item in items)
+    return {
+        "files": scenario["files"],
+        "concurrency": scenario["concurrency"] or config.sync_concurrency,
+        "seconds": elapsed,
+        "files_per_second": scenario["files"] / elapsed if elapsed else 0,
+        "mb_per_second": total_bytes / (1024 * 1024) / elapsed if elapsed else 0,
+        "total_mb": total_bytes / (1024 * 1024),
+        # ru_maxrss is KB on Linux (bytes on macOS); this process also hosts the fake server
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 if sys.platform != "darwin" else 1024 * 1024),
+        "processed_files": summary["processed_files"],
+        "errors": len(summary["errors"]),
+        "graph": graph.counters,
+        "storage": blobs.counters,
+        "metrics": summary["metrics"],
+    }
+
+
+def _run_in_child(scenario: Dict[str, Any], results) -> None:
+    try:
+        results.put(run_scenario(scenario))
+    except Exception as e:
+        results.put({"files": scenario["files"], "error": repr(e)})
+
+
+def print_results(results: List[Dict[str, Any]]) -> None:
+    print("\n=== Sync Benchmark ===")
+    print(f"{'files':>8} {'conc':>5} {'seconds':>9} {'files/s':>9} {'MB/s':>8} {'MB':>9} {'RSS MB':>8} {'errors':>7}")
+    for result in results:
+        if "error" in result:
+            print(f"{result['files']:>8}  failed: {result['error']}")
+            continue
+        print(f"{result['files']:>8} {result['concurrency']:>5} {result['seconds']:>9.1f} "
+              f"{result['files_per_second']:>9.1f} {result['mb_per_second']:>8.1f} {result['total_mb']:>9.1f} "
+              f"{result['peak_rss_mb']:>8.1f} {result['errors']:>7}")
+    for result in results:
+        if "error" not in result:
+            print(f"\n{result['files']} files - Graph requests: {result['graph']}")
+            print(f"{result['files']} files - Storage calls : {result['storage']}")
+            stages = result['metrics']['stages']
+            print(f"{result['files']} files - Stage seconds : "
+                  + ", ".join(f"{stage} {values['seconds']:.1f}" for stage, values in stages.items() if values['calls']))
+            print(f"{result['files']} files - File latency  : {result['metrics']['file_latency_seconds']}")
+
+
+@click.command()
+@click.option('--files', 'file_counts', type=int, multiple=True, default=[1000], show_default=True,
+              help='Library size; repeat for several runs (e.g. --files 1000 --files 10000 --files 100000)')
+@click.option('--avg-size-kb', type=int, default=64, show_default=True, help='Average synthetic file size')
+@click.option('--page-size', type=int, default=200, show_default=True, help='Items per delta page')
+@click.option('--concurrency', type=int, default=None, help='Sync workers (defaults to SYNC_CONCURRENCY)')
+@click.option('--latency-ms', type=float, default=0, show_default=True, help='Latency added to every Graph request')
+@click.option('--storage-latency-ms', type=float, default=0, show_default=True, help='Latency added to every storage call')
+@click.option('--throttle-rate', type=float, default=0.0, show_default=True, help='Fraction of Graph requests answered with 429')
+@click.option('--duplicate-ratio', type=float, default=0.0, show_default=True, help='Fraction of files duplicating earlier content (enables dedup)')
+@click.option('--graph-rate', type=float, default=10000, show_default=True, help='Graph rate limiter ceiling (req/s) for the run')
+@click.option('--storage-rate', type=float, default=10000, show_default=True, help='Storage rate limiter ceiling (req/s) for the run')
+@click.option('--seed', type=int, default=0, show_default=True)
+@click.option('--json-out', default=None, help='Also write the results to this JSON file')
+@click.option('--verbose', is_flag=True, default=False, help='Show sync INFO logging')
+def main(file_counts, avg_size_kb, page_size, concurrency, latency_ms, storage_latency_ms, throttle_rate,
+         duplicate_ratio, graph_rate, storage_rate, seed, json_out, verbose):
+    """Benchmark SharePointSync against a local fake Graph server and in-memory blob storage."""
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for files in file_counts:
+        scenario = {
+            "files": files, "avg_size_kb": avg_size_kb, "page_size": page_size, "concurrency": concurrency,
+            "latency_ms": latency_ms, "storage_latency_ms": storage_latency_ms, "throttle_rate": throttle_rate,
+            "duplicate_ratio": duplicate_ratio, "graph_rate": graph_rate, "storage_rate": storage_rate,
+            "seed": seed, "verbose": verbose,
+        }
+        print(f"Running sync benchmark: {files} files...")
+        queue = context.Queue()
+        process = context.Process(target=_run_in_child, args=(scenario, queue))
+        process.start()
+        results.append(queue.get())
+        process.join()
+
+    print_results(results)
+    if json_out:
+        with open(json_out, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {json_out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -16,6 +16,12 @@ class Config(BaseSettings):
     tenant_id: str = os.getenv("TENANT_ID", "")
     client_id: str = os.getenv("CLIENT_ID", "")
     client_secret: str = os.getenv("CLIENT_SECRET", "")
+    # Persistent MSAL token cache shared by all commands and scripts ("" disables it)
+    token_cache_file: str = os.getenv("TOKEN_CACHE_FILE", "token_cache.bin")
+    # Optional passphrase; when set the cache file is encrypted
+    token_cache_key: str = os.getenv("TOKEN_CACHE_KEY", "")
+    # Renew the token this many seconds before it expires during syncs (0 disables the background refresher)
+    token_refresh_lead_seconds: int = int(os.getenv("TOKEN_REFRESH_LEAD_SECONDS", "300"))
     
     # SharePoint Configuration
     site_id: str = os.getenv("SITE_ID", "")
@@ -36,9 +42,61 @@ class Config(BaseSettings):
     azure_openai_endpoint: str = os.getenv("AZURE_OPENAI_ENDPOINT", "")
     azure_openai_api_key: str = os.getenv("AZURE_OPENAI_API_KEY", "")
     azure_openai_embedding_model: str = os.getenv("AZURE_OPENAI_EMBEDDING_MODEL", "text-embedding-3-small")
+    # Price of the embedding model in USD per 1M tokens, used by `sync --plan` cost estimates
+    embedding_cost_per_million_tokens: float = float(os.getenv("EMBEDDING_COST_PER_MILLION_TOKENS", "0.02"))
     
     # Application Settings
-    delta_state_file: str = "delta_state.json"
+    delta_state_file: str = "delta_state.json"  # legacy; imported into sync_state_db on first run
+    sync_state_db: str = os.getenv("SYNC_STATE_DB", "sync_state.db")
+    sync_targets_file: str = os.getenv("SYNC_TARGETS_FILE", "")
+    # Pre-download filters (comma-separated extensions, e.g. ".pdf,.docx"); empty include = all
+    sync_include_extensions: str = os.getenv("SYNC_INCLUDE_EXTENSIONS", "")
+    sync_exclude_extensions: str = os.getenv("SYNC_EXCLUDE_EXTENSIONS", "")
+    sync_max_file_size_mb: int = int(os.getenv("SYNC_MAX_FILE_SIZE_MB", "0"))
+    # Store files whose quickXorHash/sha1Hash matches an already-synced file as empty reference blobs
+    sync_dedup_content: bool = os.getenv("SYNC_DEDUP_CONTENT", "false").lower() == "true"
+    # Delta pages fetched ahead of the page being processed (0 = fetch inline)
+    delta_prefetch_pages: int = int(os.getenv("DELTA_PREFETCH_PAGES", "2"))
+    # Run the indexers reading the containers a sync changed (once per batch of changes)
+    sync_trigger_indexers: bool = os.getenv("SYNC_TRIGGER_INDEXERS", "true").lower() == "true"
+    # Changes closer together than this are indexed by a single indexer run
+    indexer_debounce_seconds: int = int(os.getenv("INDEXER_DEBOUNCE_SECONDS", "60"))
+    # `sync --watch`: poll interval grows from min to max while nothing changes
+    watch_min_interval_seconds: int = int(os.getenv("WATCH_MIN_INTERVAL_SECONDS", "30"))
+    watch_max_interval_seconds: int = int(os.getenv("WATCH_MAX_INTERVAL_SECONDS", "600"))
+    # Local port receiving relayed Graph change notifications (0 = poll only)
+    watch_notify_port: int = int(os.getenv("WATCH_NOTIFY_PORT", "0"))
+    watch_client_state: str = os.getenv("WATCH_CLIENT_STATE", "")
+    # Comma-separated indexers run after changes instead of those looked up from the data sources
+    watch_indexers: str = os.getenv("WATCH_INDEXERS", "")
+    sync_concurrency: int = int(os.getenv("SYNC_CONCURRENCY", "8"))
+    sync_skip_unchanged: bool = os.getenv("SYNC_SKIP_UNCHANGED", "true").lower() == "true"
+    # Files that failed are retried by id on later runs until this many attempts have failed
+    sync_max_item_attempts: int = int(os.getenv("SYNC_MAX_ITEM_ATTEMPTS", "5"))
+    upload_block_size_mb: int = int(os.getenv("UPLOAD_BLOCK_SIZE_MB", "4"))
+    sync_fetch_sharepoint_ids: bool = os.getenv("SYNC_FETCH_SHAREPOINT_IDS", "false").lower() == "true"
+    # Microsoft Graph endpoint (override only to point sync at a test/benchmark server)
+    graph_base_url: str = os.getenv("GRAPH_BASE_URL", "https://graph.microsoft.com/v1.0")
+    graph_max_connections: int = int(os.getenv("GRAPH_MAX_CONNECTIONS", "32"))
+    graph_http2: bool = os.getenv("GRAPH_HTTP2", "true").lower() == "true"
+    upload_max_concurrency: int = int(os.getenv("UPLOAD_MAX_CONCURRENCY", "4"))
+    sidecar_mode: str = os.getenv("SIDECAR_MODE", "blob")
+    # "manifest" mode: manifest folders (one per run) kept per target; older runs are deleted (0 = keep all)
+    manifest_retention_runs: int = int(os.getenv("MANIFEST_RETENTION_RUNS", "10"))
+    sync_server_side_copy: bool = os.getenv("SYNC_SERVER_SIDE_COPY", "false").lower() == "true"
+    copy_block_size_mb: int = int(os.getenv("COPY_BLOCK_SIZE_MB", "100"))
+    # Adaptive rate limits (requests/second): start rate and ceiling for AIMD ramp-up
+    graph_rate_limit: float = float(os.getenv("GRAPH_RATE_LIMIT", "20"))
+    graph_rate_limit_max: float = float(os.getenv("GRAPH_RATE_LIMIT_MAX", "100"))
+    storage_rate_limit: float = float(os.getenv("STORAGE_RATE_LIMIT", "200"))
+    storage_rate_limit_max: float = float(os.getenv("STORAGE_RATE_LIMIT_MAX", "2000"))
+    throttle_max_retries: int = int(os.getenv("THROTTLE_MAX_RETRIES", "5"))
+    # Consecutive failed attempts (without any bytes received) before a resumable download gives up
+    download_max_retries: int = int(os.getenv("DOWNLOAD_MAX_RETRIES", "5"))
+    # Files at least this large (MB) are downloaded as concurrent byte ranges (0 disables)
+    download_parallel_threshold_mb: int = int(os.getenv("DOWNLOAD_PARALLEL_THRESHOLD_MB", "64"))
+    download_range_size_mb: int = int(os.getenv("DOWNLOAD_RANGE_SIZE_MB", "8"))
+    download_range_concurrency: int = int(os.getenv("DOWNLOAD_RANGE_CONCURRENCY", "4"))
     scopes: list = ["https://graph.microsoft.com/Files.Read.All", "https://graph.microsoft.com/Sites.Read.All"]
     
     @property
@@ -1,11 +1,11 @@
 #!/usr/bin/env python3
 """Explore Documents drive to find user guides."""
 
-import msal
 import requests
 import os
-import webbrowser
 from dotenv import load_dotenv
+from src.token_cache import get_device_code_token
+from src.graph_client import GraphClient
 
 load_dotenv()
 
@@ -18,34 +18,9 @@ SITE_ID = "comtradedoo.sharepoint.com,95bda638-a8aa-49b5-a295-fd15ef56bb89,75f73
 DOCUMENTS_DRIVE_ID = "b!OKa9laqotUmilf0V71a7ibk393Wv4AlPuRKsXzi7AWQvvM34apAOT4tIeG6b92Qk"
 
 def get_access_token():
-    """Get access token using device code flow."""
-    authority = f"https://login.microsoftonline.com/{TENANT_ID}"
-    app = msal.PublicClientApplication(
-        client_id=CLIENT_ID, 
-        authority=authority,
-        enable_pii_log=False
-    )
-    
-    flow = app.initiate_device_flow(scopes=SCOPES)
-    if "user_code" not in flow:
-        print(f"Failed to create device flow: {flow}")
-        return None
-    
-    print(f"{flow['message']}")
-    
-    # Auto-open browser
-    if 'verification_uri' in flow:
-        print(f"Opening browser...")
-        webbrowser.open(flow['verification_uri'])
-    
-    result = app.acquire_token_by_device_flow(flow)
-    
-    if "access_token" in result:
-        print("✅ Authentication successful!")
-        return result["access_token"]
-    else:
-        print(f"❌ Authentication failed: {result.get('error_description')}")
-        return None
+    """Get access token from the shared token cache, falling back to device code flow."""
+    result = get_device_code_token(CLIENT_ID, TENANT_ID, SCOPES)
+    return result["access_token"] if result else None
 
 def explore_documents_drive(access_token):
     """Explore the Documents drive for user guides."""
@@ -80,8 +55,12 @@ def explore_documents_drive(access_token):
     else:
         print(f"❌ Failed to access Documents drive: {response.status_code} - {response.text}")
 
-def explore_folder(access_token, folder_id, folder_name, level=0):
-    """Explore a specific folder."""
+def explore_folder(access_token, folder_id, folder_name, level=0, items=None):
+    """Explore a specific folder.
+
+    Child listings of the subfolders worth descending into are fetched together
+    with one Graph $batch call instead of one request per subfolder.
+    """
     if level > 2:  # Limit recursion
         return
         
@@ -89,38 +68,60 @@ def explore_folder(access_token, folder_id, folder_name, level=0):
         'Authorization': f'Bearer {access_token}',
         'Accept': 'application/json'
     }
+    indent = "   " * level
     
-    folder_url = f"https://graph.microsoft.com/v1.0/sites/{SITE_ID}/drives/{DOCUMENTS_DRIVE_ID}/items/{folder_id}/children"
-    response = requests.get(folder_url, headers=headers)
-    
-    if response.status_code == 200:
+    if items is None:
+        folder_url = f"https://graph.microsoft.com/v1.0/sites/{SITE_ID}/drives/{DOCUMENTS_DRIVE_ID}/items/{folder_id}/children"
+        response = requests.get(folder_url, headers=headers)
+        if response.status_code != 200:
+            print(f"{indent}❌ Folder access failed: {response.status_code}")
+            return
         items = response.json().get('value', [])
-        indent = "   " * level
-        print(f"{indent}📂 Inside '{folder_name}' ({len(items)} items):")
+    
+    print(f"{indent}📂 Inside '{folder_name}' ({len(items)} items):")
+    
+    # Prefetch children of relevant subfolders in batches of 20
+    subfolders = [
+        item for item in items[:10]
+        if 'folder' in item and level < 2
+        and any(keyword in item.get('name', '').lower() for keyword in ['general', 'user', 'guide', 'manual', 'doc'])
+    ]
+    children = {}
+    if subfolders:
+        graph = GraphClient(token_provider=lambda: access_token, on_unauthorized=lambda: None)
+        try:
+            responses = graph.batch_get([
+                f"/sites/{SITE_ID}/drives/{DOCUMENTS_DRIVE_ID}/items/{item['id']}/children"
+                for item in subfolders
+            ])
+        finally:
+            graph.close()
+        for item, sub in zip(subfolders, responses):
+            children[item['id']] = sub
+    
+    for item in items[:10]:  # Show first 10 items
+        icon = "📁" if 'folder' in item else "📄"
+        item_name = item.get('name', 'Unnamed')
+        print(f"{indent}  {icon} {item_name}")
         
-        for item in items[:10]:  # Show first 10 items
-            icon = "📁" if 'folder' in item else "📄"
-            item_name = item.get('name', 'Unnamed')
-            print(f"{indent}  {icon} {item_name}")
+        # Check for user guides in file names
+        if 'file' in item and any(keyword in item_name.lower() for keyword in ['guide', 'manual', 'doc', 'instruction']):
+            print(f"{indent}     🎯 USER GUIDE FOUND!")
             
-            # Check for user guides in file names
-            if 'file' in item and any(keyword in item_name.lower() for keyword in ['guide', 'manual', 'doc', 'instruction']):
-                print(f"{indent}     🎯 USER GUIDE FOUND!")
-                
-            # Continue exploring relevant folders
-            if 'folder' in item and level < 2:
-                if any(keyword in item_name.lower() for keyword in ['general', 'user', 'guide', 'manual', 'doc']):
-                    explore_folder(access_token, item['id'], item_name, level + 1)
+        # Continue exploring relevant folders
+        if item['id'] in children:
+            sub = children[item['id']]
+            if sub['status'] == 200:
+                explore_folder(access_token, item['id'], item_name, level + 1, items=sub['body'].get('value', []))
+            else:
+                print(f"{indent}   ❌ Folder access failed: {sub['status']}")
+    
+    if len(items) > 10:
+        print(f"{indent}  ... and {len(items) - 10} more items")
         
-        if len(items) > 10:
-            print(f"{indent}  ... and {len(items) - 10} more items")
-            
-        # If this looks like a user guides folder, show the path
-        if any(keyword in folder_name.lower() for keyword in ['general', 'user', 'guide']) and level <= 1:
-            print(f"{indent}📍 Possible path: /{folder_name}")
-            
-    else:
-        print(f"{indent}❌ Folder access failed: {response.status_code}")
+    # If this looks like a user guides folder, show the path
+    if any(keyword in folder_name.lower() for keyword in ['general', 'user', 'guide']) and level <= 1:
+        print(f"{indent}📍 Possible path: /{folder_name}")
 
 def test_specific_paths(access_token):
     """Test specific paths that might exist."""
@@ -1,11 +1,10 @@
 #!/usr/bin/env python3
 """Explore SharePoint site structure to find the correct folder path."""
 
-import msal
 import requests
 import os
-import webbrowser
 from dotenv import load_dotenv
+from src.token_cache import get_device_code_token
 
 load_dotenv()
 
@@ -15,34 +14,9 @@ SITE_ID = os.getenv("SITE_ID")
 SCOPES = ["https://graph.microsoft.com/Files.Read.All", "https://graph.microsoft.com/Sites.Read.All"]
 
 def get_access_token():
-    """Get access token using device code flow."""
-    authority = f"https://login.microsoftonline.com/{TENANT_ID}"
-    app = msal.PublicClientApplication(
-        client_id=CLIENT_ID, 
-        authority=authority,
-        enable_pii_log=False
-    )
-    
-    flow = app.initiate_device_flow(scopes=SCOPES)
-    if "user_code" not in flow:
-        print(f"Failed to create device flow: {flow}")
-        return None
-    
-    print(f"{flow['message']}")
-    
-    # Auto-open browser
-    if 'verification_uri' in flow:
-        print(f"Opening browser...")
-        webbrowser.open(flow['verification_uri'])
-    
-    result = app.acquire_token_by_device_flow(flow)
-    
-    if "access_token" in result:
-        print("✅ Authentication successful!")
-        return result["access_token"]
-    else:
-        print(f"❌ Authentication failed: {result.get('error_description')}")
-        return None
+    """Get access token from the shared token cache, falling back to device code flow."""
+    result = get_device_code_token(CLIENT_ID, TENANT_ID, SCOPES)
+    return result["access_token"] if result else None
 
 def explore_site(access_token):
     """Explore SharePoint site structure."""
@@ -11,14 +11,20 @@ import os
 import logging
 import json
 import click
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
 # Treat repository as a namespace: ensure parent directory is on path once
 PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
 if PROJECT_ROOT not in sys.path:
     sys.path.append(PROJECT_ROOT)
 
-from src.sharepoint_sync import SharePointSync, SharePointSyncError
+from src.sharepoint_sync import (
+    SharePointSync, SharePointSyncError, FileFilter, load_sync_targets, load_vertical_extensions
+)
+from src.sync_planner import SyncPlanner
+from src.sync_metrics import to_openmetrics
+from src.sync_watcher import SyncWatcher, WatchNotificationServer
+from src.indexer_trigger import IndexerTrigger
 from src.azure_search_setup import AzureSearchSetup, SearchSetupError
 from src.azure_search_integrated_vectorization import AzureSearchIntegratedVectorization
 from config.settings import config
@@ -215,6 +221,168 @@ def list_resources():
         logger.error(f"Failed to list resources: {e}")
         sys.exit(1)
 
+def _print_sync_summary(summary: Dict[str, Any], title: str = "Sync Summary") -> None:
+    """Print one sync summary as returned by SharePointSync.sync_sharepoint_folder."""
+    print(f"\n=== {title} ===")
+    if summary['resumed_from_page']:
+        print(f"Resumed   : after page {summary['resumed_from_page']}")
+    print(f"Processed : {summary['processed_files']}/{summary['total_files']} files")
+    print(f"Unchanged : {summary['skipped_files']} files (skipped)")
+    print(f"Deleted   : {summary['deleted_files']} files removed from blob storage")
+    print(f"Filtered  : {summary['filtered_files']} files ({summary['filtered_bytes'] / (1024 * 1024):.1f} MB) not transferred")
+    print(f"Deduped   : {summary['deduplicated_files']} copies stored as references")
+    print(f"Success   : {summary['success_rate']:.1f}%")
+    metrics = summary['metrics']
+    mb = 1024 * 1024
+    busiest = sorted(metrics['stages'].items(), key=lambda kv: -kv[1]['seconds'])[:3]
+    print("Stages    : " + ", ".join(f"{stage} {values['seconds']:.1f}s" for stage, values in busiest))
+    print(f"Bytes     : {metrics['bytes']['downloaded'] / mb:.1f} MB down, {metrics['bytes']['uploaded'] / mb:.1f} MB up, "
+          f"{metrics['bytes']['copied'] / mb:.1f} MB copied server-side")
+    counters = metrics['counters']
+    print(f"Latency   : p50 {metrics['file_latency_seconds']['p50']:.2f}s, p95 {metrics['file_latency_seconds']['p95']:.2f}s per file; "
+          f"{counters.get('graph_throttled', 0) + counters.get('storage_throttled', 0)} throttled, "
+          f"{counters.get('graph_retries', 0) + counters.get('storage_retries', 0) + counters.get('download_retries', 0)} retries")
+    if summary['errors']:
+        print(f"Errors ({len(summary['errors'])} up to 5 shown):")
+        for err in summary['errors'][:5]:
+            print(f"  - {err}")
+
+def _print_sync_plan(plan: Dict[str, Any], title: str = "Sync Plan") -> None:
+    """Print one dry-run plan as returned by SyncPlanner.plan."""
+    mb = 1024 * 1024
+    print(f"\n=== {title} ({plan['mode']} sync, {plan['pages']} delta pages) ===")
+    print(f"Files     : {plan['files']} in feed, {plan['deleted_files']} deletions")
+    print(f"Transfer  : {plan['transfer_files']} files ({plan['transfer_bytes'] / mb:.1f} MB)")
+    print(f"Unchanged : {plan['unchanged_files']} files")
+    print(f"Filtered  : {plan['filtered_files']} files ({plan['filtered_bytes'] / mb:.1f} MB)")
+    if plan['duplicate_files']:
+        print(f"Duplicates: {plan['duplicate_files']} files ({plan['duplicate_bytes'] / mb:.1f} MB) stored as references")
+    
+    if plan['by_category']:
+        print("\nBy category:")
+        for category, entry in sorted(plan['by_category'].items(), key=lambda kv: -kv[1]['bytes']):
+            print(f"  {category:<13} {entry['files']:>7} files {entry['bytes'] / mb:>10.1f} MB  ~{entry['estimated_tokens']:,} tokens")
+        print("By extension:")
+        for ext, entry in sorted(plan['by_extension'].items(), key=lambda kv: -kv[1]['bytes']):
+            print(f"  {ext:<13} {entry['files']:>7} files {entry['bytes'] / mb:>10.1f} MB")
+    
+    print(f"\nEmbedding : ~{plan['estimated_tokens']:,} tokens, ~${plan['estimated_embedding_cost']:.2f}")
+    throughput = plan['throughput']
+    if plan['estimated_seconds'] is not None:
+        print(f"Transfer time: ~{plan['estimated_seconds'] / 60:.1f} min "
+              f"(measured {throughput['files_per_second']:.1f} files/s, "
+              f"{throughput['bytes_per_second'] / mb:.1f} MB/s over {throughput['runs']} runs)")
+    elif not throughput:
+        print("Transfer time: no measured throughput yet; run a sync first to calibrate")
+
+def _indexer_trigger(indexers) -> Optional[IndexerTrigger]:
+    """IndexerTrigger for the configured search service, or None if search isn't configured."""
+    try:
+        return IndexerTrigger(AzureSearchIntegratedVectorization(), indexers=indexers)
+    except Exception as e:
+        logger.warning(f"Not triggering indexers: {e}")
+        return None
+
+def _watch(sp_sync: SharePointSync, targets, concurrency, trigger: Optional[IndexerTrigger]) -> None:
+    """Run `sync --watch` until Ctrl+C, handing changed containers to the indexer trigger."""
+    def _on_changes(changed: Dict[str, Dict[str, Any]]) -> None:
+        for name, summary in changed.items():
+            _print_sync_summary(summary, f"Changes: {name}")
+        if trigger:
+            trigger.record_summaries(changed)
+    
+    watcher = SyncWatcher(sp_sync, targets, concurrency=concurrency, on_changes=_on_changes)
+    notifications = None
+    if config.watch_notify_port:
+        notifications = WatchNotificationServer(watcher, config.watch_notify_port, config.watch_client_state).start()
+    if trigger:
+        trigger.start()
+    print("👀 Watching for changes (Ctrl+C to stop)...")
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        print("\nStopping watch")
+    finally:
+        if notifications:
+            notifications.stop()
+        if trigger:
+            # Index what changed since the last debounced run before exiting
+            trigger.stop()
+
+@cli.command()
+@click.option('--concurrency', type=int, default=None, help='Files transferred in parallel (defaults to SYNC_CONCURRENCY)')
+@click.option('--force', is_flag=True, default=False, help='Re-upload files even when the blob already matches the SharePoint version')
+@click.option('--resume', is_flag=True, default=False, help='Continue an interrupted sync from its last checkpointed delta page')
+@click.option('--targets', 'targets_file', default=None, help='JSON file listing site/drive/folder/container targets to sync concurrently (defaults to SYNC_TARGETS_FILE)')
+@click.option('--vertical-config', default=None, help="vertical_config.json whose indexed_extensions limit which files are transferred")
+@click.option('--max-size-mb', type=int, default=None, help='Skip files larger than this (defaults to SYNC_MAX_FILE_SIZE_MB, 0 = no limit)')
+@click.option('--plan', is_flag=True, default=False, help='Dry run: enumerate the delta feed and report counts, bytes, time and embedding cost without transferring')
+@click.option('--metrics-json', default=None, help='Write per-stage timings, byte counts, retries and file latency percentiles to this JSON file')
+@click.option('--metrics-prom', default=None, help='Write the same metrics in Prometheus/OpenMetrics text format (e.g. for the node_exporter textfile collector)')
+@click.option('--watch', is_flag=True, default=False, help='Keep running: re-sync from the saved delta link on an adaptive interval (or on relayed change notifications) until interrupted')
+@click.option('--trigger-indexers/--no-trigger-indexers', default=None, help='Run the indexers of containers that received changes (defaults to SYNC_TRIGGER_INDEXERS)')
+@click.option('--indexer', 'indexers', multiple=True, help='Indexer to run on changes instead of those looked up from the data sources; repeatable (defaults to WATCH_INDEXERS)')
+def sync(concurrency, force, resume, targets_file, vertical_config, max_size_mb, plan, metrics_json, metrics_prom,
+         watch, trigger_indexers, indexers):
+    """Sync SharePoint folder to Azure Blob Storage (incremental via delta API)"""
+    try:
+        targets_file = targets_file or config.sync_targets_file
+        sp_sync = SharePointSync()
+        if vertical_config or max_size_mb is not None:
+            sp_sync.file_filter = FileFilter.from_settings(
+                load_vertical_extensions(vertical_config) if vertical_config else config.sync_include_extensions,
+                config.sync_exclude_extensions,
+                config.sync_max_file_size_mb if max_size_mb is None else max_size_mb
+            )
+        try:
+            if plan:
+                planner = SyncPlanner(sp_sync)
+                targets = load_sync_targets(targets_file) if targets_file else [None]
+                for target in targets:
+                    sync_plan = planner.plan(target, force=force)
+                    _print_sync_plan(sync_plan, "Sync Plan" if target is None else f"Sync Plan: {target.name}")
+                return
+            indexers = list(indexers) or [name.strip() for name in config.watch_indexers.split(",") if name.strip()]
+            if trigger_indexers is None:
+                trigger_indexers = config.sync_trigger_indexers
+            if watch:
+                _watch(sp_sync, load_sync_targets(targets_file) if targets_file else None, concurrency,
+                       _indexer_trigger(indexers) if trigger_indexers else None)
+                return
+            if targets_file:
+                targets = load_sync_targets(targets_file)
+                summaries = sp_sync.sync_targets(targets, concurrency=concurrency, force=force, resume=resume)
+            else:
+                summaries = {"default": sp_sync.sync_sharepoint_folder(concurrency=concurrency, force=force, resume=resume)}
+        finally:
+            sp_sync.close()
+        
+        for name, summary in summaries.items():
+            _print_sync_summary(summary, "Sync Summary" if name == "default" else f"Sync Summary: {name}")
+        reports = {name: summary['metrics'] for name, summary in summaries.items()}
+        if metrics_json:
+            with open(metrics_json, 'w') as f:
+                json.dump(reports, f, indent=2)
+            print(f"\nMetrics written to {metrics_json}")
+        if metrics_prom:
+            with open(metrics_prom, 'w') as f:
+                f.write(to_openmetrics(reports))
+            print(f"Metrics written to {metrics_prom} (OpenMetrics)")
+        if trigger_indexers and any(summary['changed_files'] for summary in summaries.values()):
+            trigger = _indexer_trigger(indexers)
+            if trigger:
+                # All targets finished together: one run per affected indexer, no need to wait out a window
+                trigger.record_summaries(summaries)
+                started = trigger.flush(requeue=False)
+                if started:
+                    print(f"\n🚀 Indexers triggered: {', '.join(started)}")
+        if any(summary['errors'] for summary in summaries.values()):
+            sys.exit(1)
+    except SharePointSyncError as e:
+        logger.error(f"Sync failed: {e}")
+        print(f"❌ Sync failed: {e}")
+        sys.exit(1)
+
 @cli.command()
 def full_setup():
     """Run complete setup: SharePoint sync + Azure AI Search configuration"""
@@ -383,7 +551,8 @@ def test_integrated(prefix):
 @click.option('--ix-name', default=None, help='Explicit indexer name (optional)')
 @click.option('--split-json', is_flag=True, default=False, help='Create separate -json vertical for .json files')
 @click.option('--json-only', is_flag=True, default=False, help='Create only the -json vertical (no base vertical)')
-def create_vertical(prefix, container, json_container, ds_name, ss_name, idx_name, ix_name, split_json, json_only):
+@click.option('--sidecar-mode', type=click.Choice(['blob', 'manifest', 'metadata']), default=None, help='Sync sidecar mode to map fields for (defaults to SIDECAR_MODE)')
+def create_vertical(prefix, container, json_container, ds_name, ss_name, idx_name, ix_name, split_json, json_only, sidecar_mode):
     """Create or update an integrated vectorization vertical with customizable names.
 
     If explicit names are not provided they are derived from prefix:
@@ -403,7 +572,8 @@ def create_vertical(prefix, container, json_container, ds_name, ss_name, idx_nam
             index_name=idx_name,
             indexer_name=ix_name,
             create_json_vertical=split_json,
-            json_only=json_only
+            json_only=json_only,
+            sidecar_mode=sidecar_mode
         )
         if json_only:
             print("\n=== JSON-Only Vertical Resources ===")
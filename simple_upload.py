@@ -40,6 +40,10 @@ def upload_files(folder_type: str):
     # Extract account name
     account_name = storage_url.split('//')[1].split('.')[0]
     
+    # Block size and per-file parallelism for large uploads
+    block_size = max(1, int(os.getenv('UPLOAD_BLOCK_SIZE_MB', '4'))) * 1024 * 1024
+    max_concurrency = int(os.getenv('UPLOAD_MAX_CONCURRENCY', '4'))
+    
     # Build connection string
     conn_str = f"DefaultEndpointsProtocol=https;AccountName={account_name};AccountKey={storage_key};EndpointSuffix=core.windows.net"
     
@@ -62,8 +66,12 @@ def upload_files(folder_type: str):
     print(f"   Storage: {account_name}")
     print(f"   Source: {source_dir}\n")
     
-    # Create blob service client
-    blob_service_client = BlobServiceClient.from_connection_string(conn_str)
+    # Create blob service client (files larger than one block are uploaded as parallel staged blocks)
+    blob_service_client = BlobServiceClient.from_connection_string(
+        conn_str,
+        max_block_size=block_size,
+        max_single_put_size=block_size
+    )
     
     # Get or create container
     container_client = blob_service_client.get_container_client(container_name)
@@ -90,7 +98,8 @@ def upload_files(folder_type: str):
             blob_client.upload_blob(
                 data,
                 overwrite=True,
-                content_settings=ContentSettings(content_type=content_type)
+                content_settings=ContentSettings(content_type=content_type),
+                max_concurrency=max_concurrency
             )
         
         print(f"  ✅ {blob_name}")
@@ -88,7 +88,12 @@ class AzureSearchIntegratedVectorization:
             "type": "azureblob",
             "credentials": {"connectionString": connection_string},
             "container": {"name": container or self.config.az_container},
-            "description": "SharePoint files storage for integrated vectorization"
+            "description": "SharePoint files storage for integrated vectorization",
+            # Sync deletes blobs for items removed in SharePoint; with blob soft delete enabled
+            # on the storage account the indexer then removes the matching documents too
+            "dataDeletionDetectionPolicy": {
+                "@odata.type": "#Microsoft.Azure.Search.NativeBlobSoftDeleteDeletionDetectionPolicy"
+            }
         }
         
         result = self._make_request("PUT", f"datasources/{name}", data_source_definition)
@@ -330,11 +335,14 @@ class AzureSearchIntegratedVectorization:
                                                      skillset_name: str = "ss-spofiles-integrated",
                                                      indexed_extensions: str = ".pdf,.docx,.pptx,.txt,.xlsx,.html,.md",
                                                      excluded_extensions: str = ".xml",
-                                                     parsing_mode: str = "default") -> Dict[str, Any]:
+                                                     parsing_mode: str = "default",
+                                                     sidecar_mode: Optional[str] = None) -> Dict[str, Any]:
         """Create indexer wired to skillset producing embeddings -> vector field.
         
         Parameters:
             parsing_mode: Parsing mode for blob indexer. Options: "default", "json", "jsonArray", "delimitedText"
+            sidecar_mode: How sync stores file metadata (defaults to config.sidecar_mode). With "metadata",
+                source_url and lastModified come from the SharePoint blob metadata written by sync.
         """
         logger.info(f"Creating indexer with integrated vectorization: {name} (parsing_mode={parsing_mode})")
 
@@ -365,6 +373,19 @@ class AzureSearchIntegratedVectorization:
                 {"sourceFieldName": "metadata_storage_last_modified", "targetFieldName": "lastModified"},
                 {"sourceFieldName": "metadata_storage_size", "targetFieldName": "size"},
                 {"sourceFieldName": "metadata_storage_file_extension", "targetFieldName": "file_extension"}
+            ] if (sidecar_mode or self.config.sidecar_mode) != "metadata" else [
+                {  # Create key from path (base64)
+                    "sourceFieldName": "metadata_storage_path",
+                    "targetFieldName": "id",
+                    "mappingFunction": {"name": "base64Encode"}
+                },
+                {"sourceFieldName": "metadata_storage_name", "targetFieldName": "title"},
+                {"sourceFieldName": "content", "targetFieldName": "content"},
+                # SharePoint URL and modification time from the blob metadata sync writes
+                {"sourceFieldName": "source_url", "targetFieldName": "source_url"},
+                {"sourceFieldName": "sp_mtime", "targetFieldName": "lastModified"},
+                {"sourceFieldName": "metadata_storage_size", "targetFieldName": "size"},
+                {"sourceFieldName": "metadata_storage_file_extension", "targetFieldName": "file_extension"}
             ],
             "outputFieldMappings": [
                 {  # Map embedding skill output to vector field
@@ -403,6 +424,25 @@ class AzureSearchIntegratedVectorization:
         
         return result
 
+    def get_indexers_by_container(self) -> Dict[str, List[str]]:
+        """Map each blob container to the enabled indexers whose data source reads it."""
+        data_sources = self._make_request("GET", "datasources")
+        indexers = self._make_request("GET", "indexers")
+        for result in (data_sources, indexers):
+            if "error" in result:
+                raise SearchSetupError(f"Failed to list indexers and data sources: {result}")
+        
+        containers = {
+            ds["name"]: (ds.get("container") or {}).get("name")
+            for ds in data_sources.get("value", [])
+        }
+        by_container: Dict[str, List[str]] = {}
+        for indexer in indexers.get("value", []):
+            container = containers.get(indexer.get("dataSourceName"))
+            if container and not indexer.get("disabled"):
+                by_container.setdefault(container, []).append(indexer["name"])
+        return by_container
+
     def setup_integrated_vectorization_pipeline(self) -> Dict[str, Any]:
         """Set up complete Azure AI Search pipeline with integrated vectorization."""
         logger.info("Setting up Azure AI Search pipeline with integrated vectorization")
@@ -535,7 +575,8 @@ class AzureSearchIntegratedVectorization:
                         index_name: Optional[str] = None,
                         indexer_name: Optional[str] = None,
                         create_json_vertical: bool = False,
-                        json_only: bool = False) -> Dict[str, Any]:
+                        json_only: bool = False,
+                        sidecar_mode: Optional[str] = None) -> Dict[str, Any]:
         """Create or update a vertical (data source, skillset, index, indexer).
 
         You may specify explicit names; otherwise names are derived from prefix:
@@ -545,6 +586,7 @@ class AzureSearchIntegratedVectorization:
             prefix: Base prefix (sanitized) for fallback names.
             container: Optional blob container override (defaults to config.az_container).
             data_source_name, skillset_name, index_name, indexer_name: Optional explicit resource names.
+            sidecar_mode: Sync sidecar mode the field mappings should match (defaults to config.sidecar_mode).
         """
         safe = ''.join(c for c in prefix.lower() if c.isalnum() or c == '-')[:48]
         if not safe:
@@ -594,7 +636,8 @@ class AzureSearchIntegratedVectorization:
         ss = self.create_skillset(ss_name)
         ix = self.create_indexer_with_integrated_vectorization(ix_name, ds_name, idx_name, ss_name,
                                                                indexed_extensions=".pdf,.docx,.pptx,.txt,.xlsx,.html,.md",
-                                                               excluded_extensions=".xml,.json")
+                                                               excluded_extensions=".xml,.json",
+                                                               sidecar_mode=sidecar_mode)
         run = self.run_indexer(ix_name)
 
         json_resources = None
@@ -0,0 +1,168 @@
+import time
+import logging
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+import httpx
+from src.rate_limiter import AdaptiveRateLimiter, THROTTLE_STATUS_CODES, parse_retry_after
+from src.sync_metrics import count_event
+
+logger = logging.getLogger(__name__)
+
+GRAPH_BASE_URL = "https://graph.microsoft.com/v1.0"
+
+# Graph JSON batching accepts at most 20 sub-requests per $batch call
+GRAPH_BATCH_LIMIT = 20
+
+
+class GraphClient:
+    """
+    Pooled, keep-alive HTTP client for Microsoft Graph shared by all sync workers.
+
+    Wraps one thread-safe httpx.Client so every request reuses the same TCP+TLS
+    connections; with HTTP/2 enabled, concurrent workers multiplex many in-flight
+    requests over a single connection. The bearer token comes from token_provider
+    on every request, and a 401 triggers on_unauthorized plus one retry with a
+    fresh token. When a limiter is given, every request waits for it, and 429/503
+    answers feed it their Retry-After before being retried (up to max_throttle_retries).
+    base_url points $batch at another endpoint (e.g. the benchmark's fake Graph server).
+    """
+
+    def __init__(self, token_provider: Callable[[], str], on_unauthorized: Callable[[], None],
+                 max_connections: int = 32, http2: bool = True, timeout: float = 60.0,
+                 limiter: Optional[AdaptiveRateLimiter] = None, max_throttle_retries: int = 5,
+                 base_url: str = GRAPH_BASE_URL):
+        self.base_url = base_url.rstrip("/")
+        self._token_provider = token_provider
+        self._on_unauthorized = on_unauthorized
+        self._limiter = limiter
+        self._max_throttle_retries = max_throttle_retries
+        self._client = httpx.Client(
+            http2=http2,
+            # /content answers with a 302 to a pre-authenticated download URL;
+            # httpx drops the Authorization header when the redirect leaves the Graph host
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            timeout=httpx.Timeout(timeout, connect=10.0)
+        )
+
+    def close(self) -> None:
+        self._client.close()
+
+    def _send(self, method: str, url: str, headers: Optional[Dict[str, str]] = None,
+              stream: bool = False, authenticate: bool = True, **kwargs) -> httpx.Response:
+        """
+        Send a request with a bearer token, refreshing the token once on 401 and backing off on throttling.
+        With authenticate=False no token is sent (pre-authenticated download URLs).
+        """
+        refreshed = False
+        throttle_retries = 0
+        while True:
+            if self._limiter:
+                self._limiter.acquire()
+            request_headers = dict(headers or {})
+            if authenticate:
+                request_headers["Authorization"] = f"Bearer {self._token_provider()}"
+            request = self._client.build_request(method, url, headers=request_headers, **kwargs)
+            response = self._client.send(request, stream=stream)
+            count_event("graph_requests")
+            
+            if response.status_code == 401 and authenticate and not refreshed:
+                # Token might have expired, get a new one
+                response.close()
+                count_event("graph_token_refreshes")
+                self._on_unauthorized()
+                refreshed = True
+                continue
+            
+            if response.status_code in THROTTLE_STATUS_CODES:
+                self.report_throttle(response.headers.get("Retry-After"))
+                if throttle_retries < self._max_throttle_retries:
+                    response.close()
+                    count_event("graph_retries")
+                    throttle_retries += 1
+                    continue
+            elif self._limiter:
+                self._limiter.on_success()
+            return response
+
+    def report_throttle(self, retry_after: Optional[str]) -> None:
+        """Feed a throttled answer (including $batch sub-responses) to the limiter."""
+        count_event("graph_throttled")
+        if self._limiter:
+            self._limiter.on_throttle(parse_retry_after(retry_after))
+
+    def request(self, method: str, url: str, headers: Optional[Dict[str, str]] = None, **kwargs) -> httpx.Response:
+        """Send a request and read the full response body."""
+        return self._send(method, url, headers=headers, **kwargs)
+
+    def get(self, url: str, headers: Optional[Dict[str, str]] = None) -> httpx.Response:
+        return self.request("GET", url, headers=headers)
+
+    @contextmanager
+    def stream(self, method: str, url: str, headers: Optional[Dict[str, str]] = None,
+               authenticate: bool = True) -> Iterator[httpx.Response]:
+        """Open a streamed response; the connection returns to the pool on exit."""
+        response = self._send(method, url, headers=headers, stream=True, authenticate=authenticate)
+        try:
+            yield response
+        finally:
+            response.close()
+
+    def batch_get(self, urls: List[str], max_rounds: int = 3) -> List[Dict[str, Any]]:
+        """
+        Fetch many Graph resources through JSON $batch, packing up to 20 GET
+        sub-requests per POST and demultiplexing the answers back into input order.
+
+        urls may be absolute Graph URLs or paths relative to the v1.0 endpoint.
+        Throttled sub-requests (429/503) are resent in a later round after the
+        largest Retry-After they reported. Returns one {"status", "headers", "body"}
+        dict per url; a failed batch POST raises httpx.HTTPStatusError.
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(urls)
+        pending = list(range(len(urls)))
+
+        for round_number in range(max_rounds):
+            throttled = []
+            retry_after = 0
+            for start in range(0, len(pending), GRAPH_BATCH_LIMIT):
+                chunk = pending[start:start + GRAPH_BATCH_LIMIT]
+                payload = {
+                    "requests": [
+                        {"id": str(index), "method": "GET", "url": self._relative_url(urls[index])}
+                        for index in chunk
+                    ]
+                }
+                response = self.request("POST", f"{self.base_url}/$batch", json=payload)
+                response.raise_for_status()
+
+                for sub in response.json().get("responses", []):
+                    index = int(sub["id"])
+                    status = sub.get("status", 0)
+                    headers = sub.get("headers", {})
+                    if status in THROTTLE_STATUS_CODES and round_number < max_rounds - 1:
+                        throttled.append(index)
+                        retry_after = max(retry_after, parse_retry_after(headers.get("Retry-After")) or 1)
+                        continue
+                    results[index] = {"status": status, "headers": headers, "body": sub.get("body")}
+
+            if not throttled:
+                break
+            logger.warning(f"{len(throttled)} batched Graph request(s) throttled; retrying in {retry_after:.0f}s")
+            count_event("graph_throttled", len(throttled))
+            count_event("graph_retries", len(throttled))
+            if self._limiter:
+                self._limiter.on_throttle(retry_after)
+            else:
+                time.sleep(retry_after)
+            pending = sorted(throttled)
+
+        return [
+            result if result is not None else {"status": 0, "headers": {}, "body": None}
+            for result in results
+        ]
+
+    def _relative_url(self, url: str) -> str:
+        """$batch sub-requests take URLs relative to the versioned endpoint."""
+        if url.startswith(self.base_url):
+            url = url[len(self.base_url):]
+        return url if url.startswith("/") else f"/{url}"
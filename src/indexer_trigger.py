@@ -0,0 +1,154 @@
+import time
+import logging
+import threading
+from typing import Any, Dict, List, Optional
+from config.settings import config
+
+logger = logging.getLogger(__name__)
+
+# Under a steady stream of changes, run anyway once this many debounce windows have passed
+MAX_DEBOUNCE_WINDOWS = 5
+
+
+class IndexerTrigger:
+    """
+    Runs the indexers of the blob containers that sync changed, once per batch of changes.
+
+    Changes are recorded per container. A flush starts after debounce_seconds
+    without new changes (or MAX_DEBOUNCE_WINDOWS windows after the first one, so a
+    busy library is still indexed). The flush resolves the containers to their
+    indexers through the data sources on the search service, so one indexer shared
+    by several containers or targets runs only once. An indexer whose current run is
+    still in progress is not started again; it is queued on its own and retried
+    after another window.
+
+    search_client is an AzureSearchIntegratedVectorization (or anything with
+    run_indexer, get_indexer_status and get_indexers_by_container). Passing indexers
+    skips the lookup and runs those for changes in any container.
+    """
+
+    def __init__(self, search_client: Any, debounce_seconds: Optional[float] = None,
+                 indexers: Optional[List[str]] = None):
+        self.search_client = search_client
+        self.debounce_seconds = config.indexer_debounce_seconds if debounce_seconds is None else debounce_seconds
+        self.indexers = list(indexers or [])
+        self.triggered: Dict[str, int] = {}
+        self._pending: Dict[str, int] = {}
+        # Indexers that were busy at the last flush, with the changes they still owe
+        self._retry: Dict[str, int] = {}
+        self._first_change = 0.0
+        self._last_change = 0.0
+        self._cond = threading.Condition()
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+
+    def record_changes(self, container: str, count: int = 1) -> None:
+        """Note that count blobs in container were written or removed."""
+        if count <= 0:
+            return
+        with self._cond:
+            self._mark_change()
+            self._pending[container] = self._pending.get(container, 0) + count
+            self._cond.notify()
+    
+    def _mark_change(self) -> None:
+        now = time.monotonic()
+        if not self._pending and not self._retry:
+            self._first_change = now
+        self._last_change = now
+
+    def record_summaries(self, summaries: Dict[str, Dict[str, Any]]) -> None:
+        """Record the changes of {target name: summary} as returned by sync."""
+        for summary in summaries.values():
+            self.record_changes(summary["container"], summary["changed_files"])
+
+    def _due_at(self) -> float:
+        window = self.debounce_seconds
+        return min(self._last_change + window, self._first_change + window * MAX_DEBOUNCE_WINDOWS)
+
+    def start(self) -> "IndexerTrigger":
+        """Flush in the background whenever a debounce window closes (for long-running watch mode)."""
+        self._thread = threading.Thread(target=self._run, name="indexer-trigger", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop the background thread and run whatever is still pending."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        self.flush(requeue=False)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._stopping and (not (self._pending or self._retry) or self._due_at() > time.monotonic()):
+                    self._cond.wait(self._due_at() - time.monotonic() if self._pending or self._retry else None)
+                if self._stopping:
+                    return
+            self.flush()
+
+    def flush(self, requeue: bool = True) -> List[str]:
+        """
+        Run the indexers of all pending containers now. Returns the indexers started.
+        
+        Indexers that are still running are queued again unless requeue is False
+        (one-shot sync, where nothing would retry them).
+        """
+        with self._cond:
+            pending, self._pending = self._pending, {}
+            retry, self._retry = self._retry, {}
+        if not pending and not retry:
+            return []
+
+        try:
+            changes = self._resolve(pending) if pending else {}
+        except Exception as e:
+            logger.error(f"Could not look up indexers for {', '.join(pending)}: {e}")
+            changes = {}
+        for indexer, count in retry.items():
+            changes[indexer] = changes.get(indexer, 0) + count
+
+        started, busy = [], {}
+        for indexer, count in changes.items():
+            try:
+                status = self.search_client.get_indexer_status(indexer)
+                if (status.get("lastResult") or {}).get("status") == "inProgress":
+                    if requeue:
+                        logger.info(f"⏳ Indexer {indexer} is already running; retrying after the next window")
+                        busy[indexer] = count
+                    else:
+                        logger.warning(f"⏳ Indexer {indexer} is already running; not starting it again")
+                    continue
+                self.search_client.run_indexer(indexer)
+                self.triggered[indexer] = self.triggered.get(indexer, 0) + 1
+                started.append(indexer)
+                logger.info(f"🚀 Triggered indexer {indexer} for {count} changed blobs")
+            except Exception as e:
+                logger.error(f"Failed to trigger indexer {indexer}: {e}")
+
+        if busy:
+            with self._cond:
+                self._mark_change()
+                for indexer, count in busy.items():
+                    self._retry[indexer] = self._retry.get(indexer, 0) + count
+                self._cond.notify()
+        return started
+
+    def _resolve(self, pending: Dict[str, int]) -> Dict[str, int]:
+        """Map the changed containers to {indexer: changed blobs}."""
+        if self.indexers:
+            return {indexer: sum(pending.values()) for indexer in self.indexers}
+        # Looked up on every flush so verticals created while watching are picked up
+        by_container = self.search_client.get_indexers_by_container()
+        changes: Dict[str, int] = {}
+        for container, count in pending.items():
+            indexers = by_container.get(container, [])
+            if not indexers:
+                logger.warning(f"No indexer reads container '{container}'; its changes are not indexed")
+            for indexer in indexers:
+                changes[indexer] = changes.get(indexer, 0) + count
+        return changes
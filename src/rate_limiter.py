@@ -0,0 +1,95 @@
+import time
+import logging
+import threading
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Status codes Graph and Storage use to signal throttling
+THROTTLE_STATUS_CODES = (429, 503)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header (delta-seconds or HTTP date) into seconds."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class AdaptiveRateLimiter:
+    """
+    Token bucket shared by every worker talking to one service, with an AIMD rate.
+
+    acquire() blocks until a token is available. on_throttle() halves the rate and,
+    when the service sent Retry-After, pauses all callers until it has passed;
+    on_success() adds back a little rate so throughput climbs again toward the
+    point where the service starts throttling.
+
+    A burst of throttled responses seen by many workers at once is one congestion
+    event: after a decrease, further throttles only extend the pause until the
+    congestion window (Retry-After, or congestion_window seconds) has passed.
+    The additive step defaults to 1% of max_rate per second, so a service with a
+    2000 req/s ceiling recovers as quickly, relative to its limit, as one with 100.
+    """
+
+    def __init__(self, name: str, initial_rate: float, max_rate: float, min_rate: float = 1.0,
+                 additive_increase: Optional[float] = None, decrease_factor: float = 0.5,
+                 congestion_window: float = 1.0):
+        self.name = name
+        self.rate = initial_rate
+        self.max_rate = max_rate
+        self.min_rate = min_rate
+        self.additive_increase = max(1.0, max_rate / 100) if additive_increase is None else additive_increase
+        self.decrease_factor = decrease_factor
+        self.congestion_window = congestion_window
+        self._window_until = 0.0
+        self._tokens = 1.0
+        self._updated_at = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Block until the caller may send one request."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                # Allow a burst of up to one second's worth of requests
+                self._tokens = min(max(self.rate, 1.0), self._tokens + (now - self._updated_at) * self.rate)
+                self._updated_at = now
+                if now < self._blocked_until:
+                    delay = self._blocked_until - now
+                elif self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                else:
+                    delay = (1.0 - self._tokens) / self.rate
+            time.sleep(delay)
+
+    def on_success(self) -> None:
+        """Additive increase: roughly +additive_increase requests/s per second of success."""
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.additive_increase / max(self.rate, 1.0))
+
+    def on_throttle(self, retry_after: Optional[float] = None) -> None:
+        """Multiplicative decrease (once per congestion window), plus a shared pause when the service named one."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = 0.0
+            if retry_after:
+                self._blocked_until = max(self._blocked_until, now + retry_after)
+            if now < self._window_until:
+                # Same congestion event as the last decrease (other workers' in-flight requests)
+                return
+            self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+            self._window_until = max(self._blocked_until, now + self.congestion_window)
+            rate = self.rate
+        logger.warning(f"{self.name} throttled; backing off to {rate:.1f} req/s"
+                       + (f" after Retry-After {retry_after:.0f}s" if retry_after else ""))
@@ -1,65 +1,282 @@
 import os
 import json
 import time
+import queue
+import sqlite3
 import logging
+import functools
+import threading
 import webbrowser
-from typing import Dict, Any, Iterator, Optional, Tuple
-import requests
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass
+from typing import Callable, Dict, Any, Iterator, List, Optional, Tuple
 import msal
-from azure.storage.blob import BlobServiceClient, BlobClient
+import httpx
+from azure.storage.blob import BlobServiceClient, BlobClient, BlobBlock
 from azure.identity import DefaultAzureCredential
-from azure.core.exceptions import AzureError, ClientAuthenticationError
-from tenacity import retry, stop_after_attempt, wait_exponential
+from azure.core.exceptions import (
+    AzureError, ClientAuthenticationError, HttpResponseError, ResourceNotFoundError,
+    ServiceRequestError, ServiceResponseError
+)
+from tenacity import retry, retry_if_not_exception_type, stop_after_attempt, wait_exponential
 from config.settings import config
+from src.sync_state import SyncStateStore
+from src.token_cache import load_token_cache, acquire_token_silent
+from src.graph_client import GraphClient
+from src.rate_limiter import AdaptiveRateLimiter, THROTTLE_STATUS_CODES, parse_retry_after
+from src.sync_metrics import SyncMetrics, TimedIterator, bind_counters, carry_counters, count_event
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Maximum sub-requests in one Blob Batch call
+BLOB_BATCH_SIZE = 256
+
+# Where sidecar metadata goes: per-file <blob>.json, per-page JSONL manifests, or blob metadata only
+SIDECAR_MODES = ("blob", "manifest", "metadata")
+MANIFEST_PREFIX = "_manifests"
+
+# Shortest pause between background token renewals
+TOKEN_REFRESH_MIN_INTERVAL = 60
+
+# Storage answers retried with backoff by _storage_call besides throttling (the SDK's own retries are off)
+STORAGE_TRANSIENT_STATUS_CODES = (500, 502, 504)
+
+# Pseudo page number under which items that failed on earlier runs are retried
+RETRY_PAGE = 0
+
 class SharePointSyncError(Exception):
     """Custom exception for SharePoint sync operations."""
     pass
 
+class FileChangedError(SharePointSyncError):
+    """The file changed on SharePoint while it was being downloaded."""
+    pass
+
+class DeltaResyncRequired(SharePointSyncError):
+    """Graph refused a delta link or page cursor with 410 Gone; the enumeration has to start over."""
+    pass
+
+@dataclass
+class SyncTarget:
+    """One SharePoint folder synced into one blob container, with its own delta cursor."""
+    name: str
+    site_id: str
+    drive_id: str
+    folder_path: str
+    container: str
+    
+    @property
+    def scope(self) -> str:
+        """Key under which the target's delta link, page cursors and items are stored."""
+        return "|".join([self.site_id, self.drive_id, self.folder_path.strip(), self.container])
+
+@dataclass
+class FileFilter:
+    """Include/exclude rules evaluated against delta item metadata before any bytes move."""
+    include_extensions: Tuple[str, ...] = ()
+    exclude_extensions: Tuple[str, ...] = ()
+    max_size_bytes: int = 0
+    
+    @classmethod
+    def from_settings(cls, include: str, exclude: str, max_size_mb: int) -> "FileFilter":
+        """Build a filter from comma-separated extension lists (as used by indexers) and a size in MB."""
+        def _parse(extensions: str) -> Tuple[str, ...]:
+            parsed = []
+            for ext in extensions.split(","):
+                ext = ext.strip().lower()
+                if ext:
+                    parsed.append(ext if ext.startswith(".") else f".{ext}")
+            return tuple(parsed)
+        return cls(_parse(include), _parse(exclude), max(0, max_size_mb) * 1024 * 1024)
+    
+    def skip_reason(self, item: Dict[str, Any]) -> Optional[str]:
+        """Return why the item should not be transferred, or None to sync it."""
+        name = item.get("name", "")
+        ext = os.path.splitext(name)[1].lower()
+        if ext in self.exclude_extensions:
+            return f"extension {ext} excluded"
+        if self.include_extensions and ext not in self.include_extensions:
+            return f"extension {ext or '(none)'} not indexed"
+        if self.max_size_bytes and (item.get("size") or 0) > self.max_size_bytes:
+            return f"size {item.get('size')} bytes over limit"
+        return None
+
+def get_content_hash(item: Dict[str, Any]) -> Optional[str]:
+    """Return the Graph-provided content hash of a file item (quickXorHash on SharePoint, sha1Hash on OneDrive)."""
+    hashes = item.get("file", {}).get("hashes", {})
+    if hashes.get("quickXorHash"):
+        return f"quickxor:{hashes['quickXorHash']}"
+    if hashes.get("sha1Hash"):
+        return f"sha1:{hashes['sha1Hash'].lower()}"
+    return None
+
+def load_vertical_extensions(path: str) -> str:
+    """Read indexed_extensions from a vertical_config.json written by intelligent_vertical_creator."""
+    try:
+        with open(path, 'r') as f:
+            vertical = json.load(f)
+    except (json.JSONDecodeError, IOError) as e:
+        raise SharePointSyncError(f"Failed to load vertical config from {path}: {e}")
+    extensions = vertical.get("indexed_extensions") or ",".join(vertical.get("file_extensions", []))
+    if not extensions:
+        raise SharePointSyncError(f"Vertical config {path} has no indexed_extensions")
+    return extensions
+
+def load_sync_targets(path: str) -> List[SyncTarget]:
+    """
+    Load sync targets from a JSON file holding a list of objects with
+    name, site_id, drive_id, folder_path and container. A missing site_id or
+    container falls back to SITE_ID / AZ_CONTAINER; a missing drive_id means the
+    site's default document library and a missing folder_path the drive root.
+    
+    Every target needs its own container: blob keys are the file's path within its
+    drive, so targets sharing a container would overwrite, and delete, each other's blobs.
+    """
+    try:
+        with open(path, 'r') as f:
+            entries = json.load(f)
+    except (json.JSONDecodeError, IOError) as e:
+        raise SharePointSyncError(f"Failed to load sync targets from {path}: {e}")
+    
+    targets = []
+    for index, entry in enumerate(entries):
+        targets.append(SyncTarget(
+            name=entry.get("name") or f"target-{index + 1}",
+            site_id=entry.get("site_id", config.site_id),
+            drive_id=entry.get("drive_id", ""),
+            folder_path=entry.get("folder_path", ""),
+            container=entry.get("container", config.az_container)
+        ))
+    names = [target.name for target in targets]
+    if len(set(names)) != len(names):
+        raise SharePointSyncError(f"Sync target names must be unique: {names}")
+    by_container: Dict[str, List[str]] = {}
+    for target in targets:
+        by_container.setdefault(target.container, []).append(target.name)
+    shared = {container: names for container, names in by_container.items() if len(names) > 1}
+    if shared:
+        raise SharePointSyncError(
+            "Sync targets must use different containers (blob keys would collide): "
+            + "; ".join(f"{container}: {', '.join(names)}" for container, names in shared.items())
+        )
+    return targets
+
 class SharePointSync:
     """Handles SharePoint to Azure Blob sync operations with Service Principal authentication."""
     
-    def __init__(self):
+    def __init__(self, blob_service_client: Optional[BlobServiceClient] = None):
+        """
+        blob_service_client replaces the client built from the storage settings
+        (used by the benchmarks to run against an in-memory stand-in).
+        """
         self.config = config
         self.token = None
         self.token_expires_at = 0
+        # Sync workers share one token; serialize acquisition so only one refresh happens at a time
+        self._token_lock = threading.RLock()
+        # MSAL app and on-disk token cache are built once and shared with the other commands
+        self.token_cache = load_token_cache()
+        self._msal_app = None
+        # Scopes whose item records were seeded from a container listing
+        self._seeded_scopes = set()
+        # Background refresher renewing the token before it expires (see start_token_refresher)
+        self._refresher_thread = None
+        self._refresher_stop = threading.Event()
+        
+        # Shared limiters so concurrent workers back off together when a service throttles
+        self.graph_limiter = AdaptiveRateLimiter(
+            "Graph", self.config.graph_rate_limit, self.config.graph_rate_limit_max
+        )
+        self.storage_limiter = AdaptiveRateLimiter(
+            "Storage", self.config.storage_rate_limit, self.config.storage_rate_limit_max
+        )
+        
+        # One pooled (HTTP/2) connection set to Graph shared by all workers
+        self.graph = GraphClient(
+            token_provider=self.get_token,
+            on_unauthorized=self.invalidate_token,
+            max_connections=self.config.graph_max_connections,
+            http2=self.config.graph_http2,
+            limiter=self.graph_limiter,
+            max_throttle_retries=self.config.throttle_max_retries,
+            base_url=self.config.graph_base_url
+        )
         
         # Validate configuration
         if not self.config.validate_sharepoint_config():
             raise SharePointSyncError("SharePoint configuration is incomplete. Check your .env file.")
         if not self.config.validate_storage_config():
             raise SharePointSyncError("Azure Storage configuration is incomplete. Check your .env file.")
+        if self.config.sidecar_mode not in SIDECAR_MODES:
+            raise SharePointSyncError(f"SIDECAR_MODE must be one of {', '.join(SIDECAR_MODES)}")
         
-        # Initialize Azure Storage with account key if available, otherwise use Service Principal
-        if self.config.az_storage_account_key:
+        # Initialize Azure Storage with account key if available, otherwise use Service Principal.
+        # retry_total=0: the SDK's ExponentialRetry would back off on 503 ServerBusy by itself
+        # (ignoring Retry-After) before _storage_call and the storage limiter ever saw the throttle
+        if blob_service_client is not None:
+            self.blob_service_client = blob_service_client
+        elif self.config.az_storage_account_key:
             logger.info("Using Azure Storage account key for authentication")
             self.blob_service_client = BlobServiceClient(
                 account_url=self.config.az_storage_url,
-                credential=self.config.az_storage_account_key
+                credential=self.config.az_storage_account_key,
+                retry_total=0
             )
         else:
             logger.info("Using Service Principal for Azure Storage authentication")
             self.credential = DefaultAzureCredential()
             self.blob_service_client = BlobServiceClient(
                 account_url=self.config.az_storage_url,
-                credential=self.credential
+                credential=self.credential,
+                retry_total=0
             )
         
         # Test storage access during initialization
         self._test_storage_access()
+        
+        # The single folder configured in .env; sync_targets() fans out over more
+        self.default_target = SyncTarget(
+            name="default",
+            site_id=self.config.site_id,
+            drive_id=self.config.drive_id,
+            folder_path=self.config.folder_path,
+            container=self.config.az_container
+        )
+        
+        # Pre-download filter matching what the indexer will actually extract
+        self.file_filter = FileFilter.from_settings(
+            self.config.sync_include_extensions,
+            self.config.sync_exclude_extensions,
+            self.config.sync_max_file_size_mb
+        )
+        
+        # Durable sync state (delta links, page cursors, per-item records)
+        self.state_store = SyncStateStore(self.config.sync_state_db)
+        self.state_store.import_json_state(self.default_target.scope, self.config.delta_state_file)
         logger.info("SharePointSync initialized with Service Principal authentication")
     
-    def _test_storage_access(self):
+    def close(self) -> None:
+        """Stop the token refresher and release pooled Graph connections and the state store."""
+        self.stop_token_refresher()
+        self.graph.close()
+        self.state_store.close()
+    
+    def check_storage_access(self, targets: List[SyncTarget]) -> None:
+        """Verify the credentials can reach every target's container; raises SharePointSyncError otherwise."""
+        for target in targets:
+            self._test_storage_access(target.container)
+    
+    def _test_storage_access(self, container: Optional[str] = None):
         """Test Azure Storage access with current credentials."""
+        container = container or self.config.az_container
         try:
             # Try to get container properties to verify access
-            container_client = self.blob_service_client.get_container_client(self.config.az_container)
+            container_client = self.blob_service_client.get_container_client(container)
             properties = container_client.get_container_properties()
-            logger.info(f"✅ Storage access verified for container: {self.config.az_container}")
+            logger.info(f"✅ Storage access verified for container: {container}")
         except ClientAuthenticationError as e:
             logger.error(f"❌ Storage authentication failed: {e}")
             raise SharePointSyncError(
@@ -74,25 +291,33 @@ class SharePointSync:
         """
         Get an access token using client credentials flow if client secret is available,
         otherwise fall back to device code flow.
-        Caches the token until it expires.
+        Caches the token until it expires. Safe to call from concurrent sync workers.
         """
+        with self._token_lock:
+            return self._acquire_token()
+    
+    def invalidate_token(self) -> None:
+        """Drop the cached token so the next get_token() call fetches a new one."""
+        with self._token_lock:
+            self.token = None
+            self.token_expires_at = 0
+    
+    def _acquire_token(self) -> str:
+        """Return the cached token or acquire a new one. Caller must hold _token_lock."""
         current_time = time.time()
         if self.token and current_time < self.token_expires_at:
             return self.token
             
         logger.info("Getting new access token...")
+        app = self._get_msal_app()
         
         # Try client credentials flow first if client secret is available
-        if self.config.client_secret and self.config.client_secret != "your_client_secret_here":
+        if isinstance(app, msal.ConfidentialClientApplication):
             logger.info("Using client credentials flow (Service Principal)")
-            app = msal.ConfidentialClientApplication(
-                self.config.client_id,
-                client_credential=self.config.client_secret,
-                authority=self.config.authority
-            )
-            
-            # Use client credentials flow for service principal authentication
+            # Use client credentials flow for service principal authentication;
+            # MSAL answers from the token cache while the cached app token is still valid
             result = app.acquire_token_for_client(scopes=["https://graph.microsoft.com/.default"])
+            self._save_token_cache()
             
             if "access_token" in result:
                 self.token = result["access_token"]
@@ -104,12 +329,17 @@ class SharePointSync:
                 logger.error(f"❌ Client credentials authentication failed: {result.get('error_description', 'Unknown error')}")
                 raise SharePointSyncError(f"Client credentials authentication failed: {result.get('error_description', 'Unknown error')}")
         
+        # Reuse a cached account (refreshing silently if needed) before prompting the user
+        result = acquire_token_silent(app, self.config.scopes)
+        if result:
+            self._save_token_cache()
+            self.token = result["access_token"]
+            self.token_expires_at = current_time + result.get("expires_in", 3600) - 300
+            logger.info("✅ Reused cached sign-in from token cache")
+            return self.token
+        
         # Fallback to device code flow for interactive authentication
         logger.info("Using device code flow (Interactive authentication)")
-        app = msal.PublicClientApplication(
-            self.config.client_id, 
-            authority=self.config.authority
-        )
         
         # Use device code flow for interactive authentication
         flow = app.initiate_device_flow(scopes=self.config.scopes)
@@ -134,6 +364,7 @@ class SharePointSync:
         if "access_token" not in result:
             error_desc = result.get("error_description", "Unknown error")
             raise SharePointSyncError(f"Authentication failed: {error_desc}")
+        self._save_token_cache()
         
         self.token = result["access_token"]
         # Set expiration time (subtract 5 minutes for safety)
@@ -142,45 +373,135 @@ class SharePointSync:
         logger.info("Successfully obtained access token")
         return self.token
     
-    def load_delta_state(self) -> Dict[str, Any]:
-        """Load delta state from file."""
-        if os.path.exists(self.config.delta_state_file):
+    def refresh_token(self) -> bool:
+        """
+        Renew the token ahead of expiry without ever prompting the user.
+        
+        The new token is fetched outside the token lock, so workers keep using the
+        current (still valid) token meanwhile and only the swap is serialized.
+        Returns False when no silent renewal is possible.
+        """
+        app = self._get_msal_app()
+        if isinstance(app, msal.ConfidentialClientApplication):
+            # acquire_token_for_client would hand back the cached app token; drop it to get a new one
+            for access_token in app.token_cache.find(msal.TokenCache.CredentialType.ACCESS_TOKEN):
+                if access_token.get("client_id") == self.config.client_id:
+                    app.token_cache.remove_at(access_token)
+            result = app.acquire_token_for_client(scopes=["https://graph.microsoft.com/.default"])
+            margin = 600
+        else:
+            result = acquire_token_silent(app, self.config.scopes, force_refresh=True)
+            margin = 300
+        self._save_token_cache()
+        
+        if not result or "access_token" not in result:
+            error = (result or {}).get("error_description", "no cached account to refresh")
+            logger.warning(f"⚠️ Background token refresh failed: {error}")
+            return False
+        
+        with self._token_lock:
+            self.token = result["access_token"]
+            self.token_expires_at = time.time() + result.get("expires_in", 3600) - margin
+        logger.info("🔑 Refreshed access token ahead of expiry")
+        return True
+    
+    def start_token_refresher(self) -> None:
+        """Start the daemon thread that renews the token TOKEN_REFRESH_LEAD_SECONDS before it expires."""
+        if self.config.token_refresh_lead_seconds <= 0:
+            return
+        if self._refresher_thread and self._refresher_thread.is_alive():
+            return
+        self._refresher_stop.clear()
+        self._refresher_thread = threading.Thread(
+            target=self._token_refresh_loop, name="token-refresher", daemon=True
+        )
+        self._refresher_thread.start()
+    
+    def stop_token_refresher(self) -> None:
+        self._refresher_stop.set()
+        if self._refresher_thread:
+            self._refresher_thread.join(timeout=5)
+            self._refresher_thread = None
+    
+    def _token_refresh_loop(self) -> None:
+        lead = self.config.token_refresh_lead_seconds
+        warned = False
+        while not self._refresher_stop.is_set():
+            with self._token_lock:
+                has_token = bool(self.token)
+                expires_at = self.token_expires_at
+            if not has_token:
+                # Nothing to renew until a worker has signed in
+                self._refresher_stop.wait(30)
+                continue
+            delay = expires_at - lead - time.time()
+            if delay > 0:
+                self._refresher_stop.wait(delay)
+                continue
             try:
-                with open(self.config.delta_state_file, 'r') as f:
-                    return json.load(f)
-            except (json.JSONDecodeError, IOError) as e:
-                logger.warning(f"Failed to load delta state: {e}. Starting fresh sync.")
-        return {}
-    
-    def save_delta_state(self, state: Dict[str, Any]) -> None:
-        """Save delta state to file."""
+                refreshed = self.refresh_token()
+            except Exception as e:
+                logger.warning(f"⚠️ Background token refresh failed: {e}")
+                refreshed = False
+            if refreshed and not warned:
+                lifetime = self.token_expires_at - time.time()
+                if lifetime <= lead:
+                    logger.warning(
+                        f"⚠️ TOKEN_REFRESH_LEAD_SECONDS ({lead}s) is not shorter than the token lifetime "
+                        f"({lifetime:.0f}s); renewing every {TOKEN_REFRESH_MIN_INTERVAL}s instead"
+                    )
+                    warned = True
+            # Whatever the lead, never call AAD more than once a minute; after a failure workers
+            # still refresh on demand if the token does expire
+            self._refresher_stop.wait(TOKEN_REFRESH_MIN_INTERVAL)
+    
+    def _get_msal_app(self) -> msal.ClientApplication:
+        """Build the MSAL application once; it holds the in-memory view of the token cache."""
+        if self._msal_app is None:
+            if self.config.client_secret and self.config.client_secret != "your_client_secret_here":
+                self._msal_app = msal.ConfidentialClientApplication(
+                    self.config.client_id,
+                    client_credential=self.config.client_secret,
+                    authority=self.config.authority,
+                    token_cache=self.token_cache
+                )
+            else:
+                self._msal_app = msal.PublicClientApplication(
+                    self.config.client_id, 
+                    authority=self.config.authority,
+                    token_cache=self.token_cache
+                )
+        return self._msal_app
+    
+    def _save_token_cache(self) -> None:
+        if self.token_cache:
+            self.token_cache.save()
+    
+    def load_delta_state(self, target: Optional[SyncTarget] = None) -> Dict[str, Any]:
+        """Load delta state for a target (the configured folder by default) from the sync state store."""
+        target = target or self.default_target
+        delta_url = self.state_store.get_delta_link(target.scope)
+        return {"delta_url": delta_url} if delta_url else {}
+    
+    def save_delta_state(self, state: Dict[str, Any], target: Optional[SyncTarget] = None) -> None:
+        """Save delta state for a target (the configured folder by default) to the sync state store."""
+        target = target or self.default_target
         try:
-            with open(self.config.delta_state_file, 'w') as f:
-                json.dump(state, f, indent=2)
-            logger.info(f"Saved delta state to {self.config.delta_state_file}")
-        except IOError as e:
+            self.state_store.save_delta_link(target.scope, state["delta_url"])
+            logger.info(f"Saved delta state to {self.config.sync_state_db}")
+        except sqlite3.Error as e:
             logger.error(f"Failed to save delta state: {e}")
     
     @retry(
         stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=4, max=10)
+        wait=wait_exponential(multiplier=1, min=4, max=10),
+        retry=retry_if_not_exception_type(DeltaResyncRequired)
     )
     def graph_get(self, url: str) -> Dict[str, Any]:
         """Make a GET request to Microsoft Graph API with retry logic."""
-        token = self.get_token()
-        headers = {"Authorization": f"Bearer {token}"}
-        
-        response = requests.get(url, headers=headers)
-        
-        if response.status_code == 401:
-            # Token might have expired, get a new one
-            self.token = None
-            self.token_expires_at = 0
-            token = self.get_token()
-            headers = {"Authorization": f"Bearer {token}"}
-            response = requests.get(url, headers=headers)
+        response = self.graph.get(url)
         
-        if not response.ok:
+        if not response.is_success:
             error_detail = "Unknown error"
             try:
                 error_json = response.json()
@@ -188,77 +509,342 @@ class SharePointSync:
             except:
                 error_detail = f"HTTP {response.status_code}: {response.text[:200]}"
             
+            if response.status_code == 410:
+                # resyncRequired: the delta token expired, retrying the same URL cannot succeed
+                raise DeltaResyncRequired(f"Graph API request failed: {error_detail}")
             logger.error(f"❌ Graph API request failed: {error_detail}")
             logger.error(f"Request URL: {url}")
             raise SharePointSyncError(f"Graph API request failed: {error_detail}")
         
         return response.json()
     
-    @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=4, max=10)
-    )
-    def stream_download(self, download_url: str) -> Iterator[bytes]:
-        """Download file content as a stream with retry logic."""
-        token = self.get_token()
-        headers = {"Authorization": f"Bearer {token}"}
-        
-        with requests.get(download_url, headers=headers, stream=True) as response:
-            if response.status_code == 401:
-                # Token might have expired, get a new one
-                self.token = None
-                self.token_expires_at = 0
-                token = self.get_token()
-                headers = {"Authorization": f"Bearer {token}"}
-                with requests.get(download_url, headers=headers, stream=True) as retry_response:
-                    retry_response.raise_for_status()
-                    for chunk in retry_response.iter_content(chunk_size=1024*1024):  # 1MB chunks
+    def stream_download(self, download_url: str, start: int = 0, end: Optional[int] = None,
+                        if_match: Optional[str] = None,
+                        on_response: Optional[Callable[[httpx.Response], None]] = None,
+                        authenticate: bool = True) -> Iterator[bytes]:
+        """
+        Download file content as a stream, resuming where it stopped after a dropped connection.
+        
+        Tracks the bytes already yielded and reconnects with a Range request (guarded
+        by If-Range on the first response's ETag) instead of starting again from
+        byte 0. A server that ignores the range gets its already-sent prefix skipped.
+        Attempts reset whenever a connection made progress, so a flaky link only fails
+        after DOWNLOAD_MAX_RETRIES consecutive attempts that transferred nothing.
+        
+        start/end (inclusive) restrict the download to one byte range of the file.
+        if_match pins the download to that ETag (sent as If-Match and checked against
+        the response), raising FileChangedError if the file has changed since.
+        on_response, if given, is called with the first response (after redirects).
+        authenticate=False fetches a pre-authenticated download URL without a bearer token.
+        """
+        offset = 0
+        length = None if end is None else end - start + 1
+        etag = if_match
+        failures = 0
+        while True:
+            headers = None
+            if start or offset or end is not None:
+                headers = {"Range": f"bytes={start + offset}-{'' if end is None else end}"}
+                if offset and etag and not if_match:
+                    headers["If-Range"] = etag
+            if if_match:
+                headers = dict(headers or {})
+                # If-Match needs a strong validator; weak ones are only compared below
+                if not if_match.startswith("W/"):
+                    headers["If-Match"] = if_match
+            attempt_start = offset
+            try:
+                with self.graph.stream("GET", download_url, headers=headers, authenticate=authenticate) as response:
+                    if offset and response.status_code == 416:
+                        # Everything was received before the connection dropped
+                        return
+                    if response.status_code == 412 or (
+                        if_match and response.headers.get("ETag") not in (None, if_match)
+                    ):
+                        raise FileChangedError(f"File changed while downloading (bytes from {start + offset})")
+                    response.raise_for_status()
+                    if on_response and not offset:
+                        on_response(response)
+                    
+                    skip = 0
+                    if headers and response.status_code != 206:
+                        if offset and etag and response.headers.get("ETag") not in (None, etag):
+                            raise FileChangedError(f"File changed while downloading (resumed at byte {start + offset})")
+                        logger.warning(f"Server ignored Range request; skipping {start + offset} bytes")
+                        skip = start + offset
+                    if not offset:
+                        etag = response.headers.get("ETag")
+                    
+                    for chunk in response.iter_bytes(chunk_size=1024*1024):  # 1MB chunks
+                        if skip:
+                            if len(chunk) <= skip:
+                                skip -= len(chunk)
+                                continue
+                            chunk = chunk[skip:]
+                            skip = 0
+                        if length is not None:
+                            chunk = chunk[:length - offset]
                         if chunk:
+                            offset += len(chunk)
                             yield chunk
+                        if length is not None and offset >= length:
+                            return
+                return
+            except (httpx.TransportError, httpx.HTTPStatusError) as e:
+                if isinstance(e, httpx.HTTPStatusError) and e.response.status_code < 500:
+                    raise
+                failures = 0 if offset > attempt_start else failures + 1
+                if failures >= self.config.download_max_retries:
+                    raise
+                delay = min(10, 2 ** failures)
+                count_event("download_retries")
+                logger.warning(f"Download interrupted after {offset} bytes ({e}); resuming in {delay}s")
+                time.sleep(delay)
+    
+    def parallel_download(self, download_url: str, size: int) -> Iterator[bytes]:
+        """
+        Download a large file as concurrent byte ranges, yielding them in file order.
+        
+        A single stream from SharePoint is limited well below the link speed, so
+        DOWNLOAD_RANGE_CONCURRENCY ranges of DOWNLOAD_RANGE_SIZE_MB are fetched at
+        once (each resumable on its own through stream_download). At most
+        concurrency + 1 ranges are buffered, so memory stays bounded while the
+        upload consumes ranges in order.
+        
+        The first range goes through Graph's /content redirect; the pre-authenticated
+        URL it lands on is reused for every other range, so Graph sees one request per
+        file rather than one per range. That response's ETag pins the other ranges
+        (If-Match) and its Content-Range total must still equal size, so a file that
+        changes mid-transfer raises FileChangedError instead of being stitched
+        together from two versions.
+        """
+        range_size = max(1, self.config.download_range_size_mb) * 1024 * 1024
+        concurrency = max(1, self.config.download_range_concurrency)
+        ranges = [(start, min(start + range_size, size) - 1) for start in range(0, size, range_size)]
+        
+        first: Dict[str, Any] = {}
+        
+        def _record_first(response: httpx.Response) -> None:
+            first["headers"] = dict(response.headers)
+            first["url"] = str(response.url)
+        
+        yield self._download_range(download_url, *ranges[0], on_response=_record_first)
+        headers = first.get("headers", {})
+        total = headers.get("content-range", "").rpartition("/")[2]
+        if total.isdigit() and int(total) != size:
+            raise FileChangedError(f"File size changed while downloading ({size} -> {total} bytes)")
+        etag = headers.get("etag")
+        if not etag:
+            logger.warning("Range download has no ETag; later ranges cannot be checked against the first")
+        range_url = first.get("url") or download_url
+        # Only Graph itself wants the bearer token; the redirect target is pre-authenticated
+        authenticate = range_url == download_url
+        ranges = ranges[1:]
+        
+        executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="range-download")
+        try:
+            in_flight = deque()
+            next_range = 0
+            while in_flight or next_range < len(ranges):
+                while next_range < len(ranges) and len(in_flight) <= concurrency:
+                    start, end = ranges[next_range]
+                    in_flight.append(executor.submit(
+                        carry_counters(self._download_range), range_url, start, end, etag, authenticate=authenticate
+                    ))
+                    next_range += 1
+                yield in_flight.popleft().result()
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+    
+    def _download_range(self, download_url: str, start: int, end: int, if_match: Optional[str] = None,
+                        on_response: Optional[Callable[[httpx.Response], None]] = None,
+                        authenticate: bool = True) -> bytes:
+        data = b"".join(self.stream_download(download_url, start, end, if_match, on_response, authenticate))
+        if len(data) != end - start + 1:
+            raise SharePointSyncError(f"Short read for bytes {start}-{end}: got {len(data)} bytes")
+        return data
+    
+    def _storage_call(self, func, *args, **kwargs):
+        """
+        Run one Azure Storage call through the shared storage limiter.
+        
+        The blob client is built without SDK retries, so this is the only retry loop:
+        ServerBusy (503) and 429 answers back the limiter off (honoring Retry-After),
+        500/502/504 and connection errors are retried after an exponential backoff,
+        both up to config.throttle_max_retries times; other errors propagate.
+        """
+        attempt = 0
+        while True:
+            self.storage_limiter.acquire()
+            try:
+                result = func(*args, **kwargs)
+            except HttpResponseError as e:
+                if e.status_code in THROTTLE_STATUS_CODES:
+                    retry_after = e.response.headers.get("Retry-After") if e.response is not None else None
+                    count_event("storage_throttled")
+                    # The limiter holds every caller back for Retry-After
+                    self.storage_limiter.on_throttle(parse_retry_after(retry_after))
+                    backoff = 0
+                elif e.status_code in STORAGE_TRANSIENT_STATUS_CODES:
+                    backoff = min(2 ** attempt, 30)
+                else:
+                    raise
+                if attempt >= self.config.throttle_max_retries:
+                    raise
+            except (ServiceRequestError, ServiceResponseError):
+                if attempt >= self.config.throttle_max_retries:
+                    raise
+                backoff = min(2 ** attempt, 30)
             else:
-                response.raise_for_status()
-                for chunk in response.iter_content(chunk_size=1024*1024):  # 1MB chunks
-                    if chunk:
-                        yield chunk
+                self.storage_limiter.on_success()
+                return result
+            count_event("storage_retries")
+            attempt += 1
+            if backoff:
+                time.sleep(backoff)
     
-    def upload_blob(self, blob_key: str, content_stream: Iterator[bytes], metadata: Dict[str, str]) -> None:
-        """Upload content to Azure Blob Storage with Service Principal authentication."""
+    def upload_blob(self, blob_key: str, content_stream: Iterator[bytes], metadata: Dict[str, str],
+                    container: Optional[str] = None) -> int:
+        """
+        Stream content to Azure Blob Storage with Service Principal authentication.
+        
+        Chunks are accumulated into blocks of config.upload_block_size_mb and staged
+        as they arrive (Put Block), up to config.upload_max_concurrency blocks in
+        parallel, then committed with the metadata (Put Block List). Memory use stays
+        bounded by block size x concurrency regardless of file size.
+        Content that fits in a single block is written with one Put Blob call.
+        
+        Returns the number of bytes uploaded.
+        """
+        executor = None
         try:
             blob_client = self.blob_service_client.get_blob_client(
-                container=self.config.az_container,
+                container=container or self.config.az_container,
                 blob=blob_key
             )
             
-            # Collect all chunks into bytes
-            content_bytes = b"".join(content_stream)
+            block_size = max(1, self.config.upload_block_size_mb) * 1024 * 1024
+            max_concurrency = max(1, self.config.upload_max_concurrency)
+            block_ids = []
+            pending = set()
+            buffer = bytearray()
+            total_bytes = 0
             
-            blob_client.upload_blob(
-                data=content_bytes, 
-                overwrite=True, 
-                metadata=metadata
-            )
+            for chunk in content_stream:
+                buffer.extend(chunk)
+                total_bytes += len(chunk)
+                while len(buffer) >= block_size:
+                    if executor is None:
+                        executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="blob-block")
+                    self._submit_block(executor, pending, max_concurrency, blob_client, block_ids, bytes(buffer[:block_size]))
+                    del buffer[:block_size]
+            
+            if not block_ids:
+                # Small file: a single Put Blob is one round-trip
+                self._storage_call(
+                    blob_client.upload_blob,
+                    data=bytes(buffer),
+                    overwrite=True,
+                    metadata=metadata
+                )
+            else:
+                if buffer:
+                    self._submit_block(executor, pending, max_concurrency, blob_client, block_ids, bytes(buffer))
+                for future in pending:
+                    future.result()
+                self._storage_call(
+                    blob_client.commit_block_list,
+                    [BlobBlock(block_id=block_id) for block_id in block_ids],
+                    metadata=metadata
+                )
             
-            logger.info(f"Uploaded blob: {blob_key} ({len(content_bytes)} bytes)")
+            logger.info(f"Uploaded blob: {blob_key} ({total_bytes} bytes, {max(len(block_ids), 1)} block(s))")
+            return total_bytes
             
         except AzureError as e:
             logger.error(f"Failed to upload blob {blob_key}: {e}")
             raise SharePointSyncError(f"Blob upload failed: {e}")
+        except SharePointSyncError:
+            # Raised by content_stream (e.g. FileChangedError); keep its type for the caller
+            raise
         except Exception as e:
             logger.error(f"Unexpected error uploading {blob_key}: {e}")
             raise SharePointSyncError(f"Blob upload failed: {e}")
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=True)
     
-    def upload_sidecar(self, blob_key: str, sidecar_data: Dict[str, Any]) -> None:
+    def _submit_block(self, executor: ThreadPoolExecutor, pending: set, max_concurrency: int,
+                      blob_client: BlobClient, block_ids: list, data: bytes) -> None:
+        """
+        Stage one block on the executor, first waiting for a slot if max_concurrency
+        blocks are already in flight. Block ids are zero-padded so they share a length.
+        """
+        if len(pending) >= max_concurrency:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                future.result()  # surface a failed block before staging more
+            pending.difference_update(done)
+        
+        block_id = f"{len(block_ids):08d}"
+        block_ids.append(block_id)
+        pending.add(executor.submit(
+            self._storage_call, blob_client.stage_block, block_id=block_id, data=data, length=len(data)
+        ))
+    
+    def copy_blob_from_url(self, blob_key: str, source_url: str, size: int, metadata: Dict[str, str],
+                           container: Optional[str] = None) -> int:
+        """
+        Have the storage service pull content from a pre-authenticated URL
+        (Put Block From URL + Put Block List) instead of streaming it through this host.
+        
+        The source is split into config.copy_block_size_mb ranges staged up to
+        config.upload_max_concurrency at a time; the metadata is set on commit.
+        Returns the number of bytes copied.
+        """
+        blob_client = self.blob_service_client.get_blob_client(
+            container=container or self.config.az_container,
+            blob=blob_key
+        )
+        block_size = max(1, self.config.copy_block_size_mb) * 1024 * 1024
+        block_ids = [f"{index:08d}" for index in range((size + block_size - 1) // block_size)]
+        
+        with ThreadPoolExecutor(max_workers=max(1, self.config.upload_max_concurrency),
+                                thread_name_prefix="blob-copy") as executor:
+            futures = [
+                executor.submit(
+                    self._storage_call, blob_client.stage_block_from_url,
+                    block_id=block_id,
+                    source_url=source_url,
+                    source_offset=index * block_size,
+                    source_length=min(block_size, size - index * block_size)
+                )
+                for index, block_id in enumerate(block_ids)
+            ]
+            for future in futures:
+                future.result()
+        
+        self._storage_call(
+            blob_client.commit_block_list,
+            [BlobBlock(block_id=block_id) for block_id in block_ids],
+            metadata=metadata
+        )
+        logger.info(f"Copied blob server-side: {blob_key} ({size} bytes, {len(block_ids)} block(s))")
+        return size
+    
+    def upload_sidecar(self, blob_key: str, sidecar_data: Dict[str, Any], container: Optional[str] = None) -> None:
         """Upload sidecar JSON file for better indexing."""
         try:
             sidecar_key = f"{blob_key}.json"
             sidecar_content = json.dumps(sidecar_data, indent=2).encode('utf-8')
             
             blob_client = self.blob_service_client.get_blob_client(
-                container=self.config.az_container,
+                container=container or self.config.az_container,
                 blob=sidecar_key
             )
             
-            blob_client.upload_blob(
+            self._storage_call(
+                blob_client.upload_blob,
                 data=sidecar_content,
                 overwrite=True,
                 content_type="application/json"
@@ -270,6 +856,120 @@ class SharePointSync:
             logger.error(f"Failed to upload sidecar for {blob_key}: {e}")
             # Don't raise here as sidecar is optional
     
+    def upload_manifest(self, manifest_key: str, entries: List[Dict[str, Any]],
+                        container: Optional[str] = None) -> None:
+        """Upload the sidecar metadata of one delta page as a single JSONL manifest blob."""
+        try:
+            content = "\n".join(json.dumps(entry) for entry in entries).encode('utf-8')
+            blob_client = self.blob_service_client.get_blob_client(
+                container=container or self.config.az_container,
+                blob=manifest_key
+            )
+            self._storage_call(
+                blob_client.upload_blob,
+                data=content,
+                overwrite=True,
+                content_type="application/x-ndjson"
+            )
+            logger.info(f"Uploaded manifest: {manifest_key} ({len(entries)} entries)")
+        except Exception as e:
+            logger.error(f"Failed to upload manifest {manifest_key}: {e}")
+            # Don't raise here as sidecar metadata is optional
+    
+    def prune_manifests(self, target: SyncTarget, keep_runs: Optional[int] = None) -> int:
+        """
+        Delete the manifests of all but the newest keep_runs runs of a target
+        (MANIFEST_RETENTION_RUNS by default, 0 keeps everything). Returns the blobs deleted.
+        """
+        keep_runs = self.config.manifest_retention_runs if keep_runs is None else keep_runs
+        if keep_runs <= 0:
+            return 0
+        prefix = f"{MANIFEST_PREFIX}/{target.name}/"
+        try:
+            container_client = self.blob_service_client.get_container_client(target.container)
+            names = [blob.name for blob in self._storage_call(container_client.list_blobs, name_starts_with=prefix)]
+        except AzureError as e:
+            logger.warning(f"Failed to list manifests of '{target.name}': {e}")
+            return 0
+        # Run ids are UTC timestamps, so they sort chronologically
+        runs = sorted({name[len(prefix):].split("/", 1)[0] for name in names})
+        expired = set(runs[:-keep_runs])
+        stale = [name for name in names if name[len(prefix):].split("/", 1)[0] in expired]
+        if not stale:
+            return 0
+        errors = self.delete_blobs(stale, container=target.container)
+        logger.info(f"Pruned {len(stale) - len(errors)} manifest blob(s) from {len(expired)} old run(s) of '{target.name}'")
+        return len(stale) - len(errors)
+    
+    def fetch_sharepoint_ids(self, items: List[Dict[str, Any]], target: Optional[SyncTarget] = None) -> None:
+        """
+        Fill in sharepointIds for file items that the delta feed returned without them.
+        
+        Lookups are packed into Graph $batch calls (20 items per request) instead of
+        one graph_get per file. Items are updated in place; lookup failures are logged
+        and leave the item unchanged.
+        """
+        missing = [item for item in items if not item.get("sharepointIds")]
+        if not missing:
+            return
+        
+        target = target or self.default_target
+        urls = []
+        for item in missing:
+            drive_id = item.get("parentReference", {}).get("driveId", target.drive_id)
+            urls.append(f"/drives/{drive_id}/items/{item['id']}?$select=id,sharepointIds")
+        
+        try:
+            responses = self.graph.batch_get(urls)
+        except Exception as e:
+            logger.warning(f"Batched sharepointIds lookup failed: {e}")
+            return
+        
+        for item, response in zip(missing, responses):
+            body = response.get("body") or {}
+            if response["status"] == 200 and body.get("sharepointIds"):
+                item["sharepointIds"] = body["sharepointIds"]
+            else:
+                logger.warning(f"Could not fetch sharepointIds for {item.get('name', item['id'])}: HTTP {response['status']}")
+    
+    def fetch_failed_items(self, target: SyncTarget) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Fetch the current driveItems of files that failed on earlier runs, through Graph $batch.
+        
+        Items deleted since then come back as delta-style {"id", "deleted"} entries.
+        Items that already failed SYNC_MAX_ITEM_ATTEMPTS times are left alone until
+        they change. Returns (items to retry, number given up on).
+        """
+        records = self.state_store.get_failed_items(target.scope)
+        max_attempts = max(1, self.config.sync_max_item_attempts)
+        retry_records = [record for record in records if record["attempts"] < max_attempts]
+        if not retry_records:
+            return [], len(records)
+        
+        urls = [self._drive_item_path(target, record["drive_id"], record["item_id"]) for record in retry_records]
+        try:
+            responses = self.graph.batch_get(urls)
+        except Exception as e:
+            logger.warning(f"Could not fetch previously failed items for retry: {e}")
+            return [], len(records) - len(retry_records)
+        
+        items = []
+        for record, response in zip(retry_records, responses):
+            if response["status"] == 200 and response.get("body"):
+                items.append(response["body"])
+            elif response["status"] == 404:
+                items.append({"id": record["item_id"], "deleted": {"state": "deleted"}})
+            else:
+                logger.warning(f"Could not fetch previously failed item {record['item_id']}: HTTP {response['status']}")
+        return items, len(records) - len(retry_records)
+    
+    @staticmethod
+    def _drive_item_path(target: SyncTarget, drive_id: Optional[str], item_id: str) -> str:
+        """Graph path of a driveItem, through the site's default drive when no drive id is known."""
+        drive_id = drive_id or target.drive_id
+        drive_path = f"/drives/{drive_id}" if drive_id else f"/sites/{target.site_id}/drive"
+        return f"{drive_path}/items/{item_id}"
+    
     def get_safe_blob_key(self, parent_path: str, file_name: str) -> str:
         """Generate a safe blob key from SharePoint path and filename."""
         # Remove drive prefix from parent path
@@ -284,18 +984,323 @@ class SharePointSync:
         else:
             return file_name
     
-    def process_sharepoint_item(self, item: Dict[str, Any]) -> Tuple[bool, str]:
+    def delete_blobs(self, blob_keys: List[str], container: Optional[str] = None) -> Dict[str, str]:
+        """
+        Delete blobs (and their .json sidecars in "blob" sidecar mode) using batched
+        Blob Batch requests. Blobs that are already gone are ignored.
+        Returns {blob key: error message} for the blobs whose blob or sidecar could not be deleted.
+        """
+        keys = []
+        owners = {}
+        for blob_key in blob_keys:
+            keys.append(blob_key)
+            owners[blob_key] = blob_key
+            if self.config.sidecar_mode == "blob":
+                keys.append(f"{blob_key}.json")
+                owners[f"{blob_key}.json"] = blob_key
+        
+        errors: Dict[str, str] = {}
+        container_client = self.blob_service_client.get_container_client(container or self.config.az_container)
+        for start in range(0, len(keys), BLOB_BATCH_SIZE):
+            batch = keys[start:start + BLOB_BATCH_SIZE]
+            try:
+                responses = self._storage_call(
+                    container_client.delete_blobs,
+                    *batch, delete_snapshots="include", raise_on_any_failure=False
+                )
+                for blob_key, response in zip(batch, responses):
+                    if response.status_code not in (202, 404):
+                        errors.setdefault(owners[blob_key], f"Failed to delete blob {blob_key}: HTTP {response.status_code}")
+            except AzureError as e:
+                for blob_key in batch:
+                    errors.setdefault(owners[blob_key], f"Batch delete of blob {blob_key} failed: {e}")
+        
+        for error in errors.values():
+            logger.error(error)
+        logger.info(f"Deleted {len(blob_keys)} blob(s) and sidecars ({len(errors)} failures)")
+        return errors
+    
+    def process_deleted_items(self, items: List[Dict[str, Any]], target: Optional[SyncTarget] = None,
+                              sidecar_sink: Optional[Callable[[Dict[str, Any]], None]] = None,
+                              metrics: Optional[SyncMetrics] = None) -> Tuple[int, List[str]]:
+        """
+        Remove blobs (and sidecars) for items carrying the delta 'deleted' facet.
+        
+        Deleted items usually arrive without a path, so the blob key is looked up in
+        the state store and only derived from name/parentReference as a fallback.
+        Returns (number of items removed, error messages). Items whose blob could not be
+        deleted keep their state record and are recorded as failed, so a later run deletes them again.
+        In "manifest" sidecar mode each removal is passed to sidecar_sink as a
+        {"blobKey", "deleted": true} entry. Copies re-synced because their original
+        was deleted report to sidecar_sink and metrics like any other file.
+        """
+        target = target or self.default_target
+        # (item id, blob key, is the canonical copy of deduplicated content)
+        deletions = []
+        for item in items:
+            record = self.state_store.get_item(target.scope, item["id"])
+            parent_path = item.get("parentReference", {}).get("path")
+            if record:
+                canonical = bool(record.get("content_hash") and not record.get("duplicate_of"))
+                deletions.append((item["id"], record["blob_key"], canonical))
+            elif item.get("name") and parent_path:
+                deletions.append((item["id"], self.get_safe_blob_key(parent_path, item["name"]), False))
+            else:
+                # Never synced, nothing to delete (and nothing left to retry)
+                self.state_store.clear_failed_item(target.scope, item["id"])
+        
+        if not deletions:
+            return 0, []
+        
+        failed = self.delete_blobs([blob_key for _, blob_key, _ in deletions], container=target.container)
+        removed = 0
+        for item_id, blob_key, canonical in deletions:
+            if blob_key in failed:
+                self.state_store.record_failed_item(target.scope, item_id, None, failed[blob_key])
+                continue
+            self.state_store.delete_item(target.scope, item_id)
+            removed += 1
+            if sidecar_sink:
+                sidecar_sink({"blobKey": blob_key, "deleted": True})
+            # Copies stored as references to a deleted blob need a new full copy
+            if canonical:
+                self._reassign_duplicates(target, blob_key, sidecar_sink=sidecar_sink, metrics=metrics)
+        return removed, list(failed.values())
+    
+    def seed_item_records(self, target: SyncTarget) -> bool:
+        """
+        Seed the state store from the blobs already in a target's folder (first run after upgrading).
+        
+        One List Blobs call per 5000 blobs, with metadata, replaces a Get Blob Properties
+        call per file in is_blob_unchanged. Blobs without sp_item_id metadata (sidecars,
+        manifests) are ignored. Returns whether the target's records are seeded.
+        """
+        if target.scope in self._seeded_scopes:
+            return True
+        if self.state_store.is_seeded(target.scope):
+            self._seeded_scopes.add(target.scope)
+            return True
+        
+        folder = target.folder_path.strip().strip("/")
+        prefix = f"{folder}/" if folder else None
+        try:
+            container_client = self.blob_service_client.get_container_client(target.container)
+            blobs = self._storage_call(
+                lambda: list(container_client.list_blobs(name_starts_with=prefix, include=["metadata"]))
+            )
+        except AzureError as e:
+            logger.warning(f"Could not list '{target.container}' to seed sync records; checking blobs one by one: {e}")
+            return False
+        
+        records = []
+        for blob in blobs:
+            metadata = blob.metadata or {}
+            if not metadata.get("sp_item_id"):
+                continue
+            records.append((
+                metadata["sp_item_id"], metadata.get("sp_drive_id"), blob.name,
+                metadata.get("sp_etag", ""), metadata.get("sp_ctag", ""),
+                None if metadata.get("sp_duplicate_of") else blob.size,
+                metadata.get("sp_content_hash"), metadata.get("sp_duplicate_of")
+            ))
+        self.state_store.seed_items(target.scope, records)
+        self._seeded_scopes.add(target.scope)
+        logger.info(f"Seeded {len(records)} sync record(s) for '{target.name}' from existing blobs")
+        return True
+    
+    def is_blob_unchanged(self, blob_key: str, item: Dict[str, Any], target: Optional[SyncTarget] = None,
+                          check_blob: bool = True) -> bool:
+        """
+        Check whether the blob already holds this item's content version.
+        
+        Compares the item's cTag (changes only when content changes), falling back
+        to eTag for records written before cTag was kept. The local state store is
+        consulted first; blob metadata (sp_ctag/sp_etag) is only read for items the
+        store has not seen, unless check_blob is False or the store was seeded from a
+        listing of the container (seed_item_records). Any lookup failure counts as changed.
+        """
+        ctag = item.get("cTag", "")
+        etag = item.get("eTag", "")
+        if not ctag and not etag:
+            return False
+        
+        target = target or self.default_target
+        record = self.state_store.get_item(target.scope, item["id"])
+        if record and record["blob_key"] == blob_key:
+            if ctag and record["ctag"]:
+                return record["ctag"] == ctag
+            return bool(etag) and record["etag"] == etag
+        if not check_blob or target.scope in self._seeded_scopes:
+            return False
+        
+        try:
+            blob_client = self.blob_service_client.get_blob_client(
+                container=target.container,
+                blob=blob_key
+            )
+            existing = self._storage_call(blob_client.get_blob_properties).metadata or {}
+        except ResourceNotFoundError:
+            return False
+        except AzureError as e:
+            logger.warning(f"Could not read metadata for {blob_key}, re-uploading: {e}")
+            return False
+        
+        if ctag and existing.get("sp_ctag"):
+            unchanged = existing["sp_ctag"] == ctag
+        else:
+            unchanged = bool(etag) and existing.get("sp_etag") == etag
+        if unchanged:
+            # Backfill the store so the next run answers locally
+            self._record_item(item, blob_key, target)
+        return unchanged
+    
+    def _record_item(self, item: Dict[str, Any], blob_key: str, target: SyncTarget,
+                     content_hash: Optional[str] = None, duplicate_of: Optional[str] = None) -> None:
+        """Record a synced item in the state store."""
+        drive_id = item.get("parentReference", {}).get("driveId", target.drive_id)
+        self.state_store.upsert_item(
+            target.scope, item["id"], drive_id, blob_key,
+            item.get("eTag", ""), item.get("cTag", ""), item.get("size"),
+            content_hash=content_hash, duplicate_of=duplicate_of
+        )
+    
+    def _reassign_duplicates(self, target: SyncTarget, old_blob_key: str, new_blob_key: Optional[str] = None,
+                             sidecar_sink: Optional[Callable[[Dict[str, Any]], None]] = None,
+                             metrics: Optional[SyncMetrics] = None) -> None:
+        """
+        Keep deduplicated references valid when the blob they point at moves, changes or goes away.
+        
+        With new_blob_key (same content, new location) the references are simply re-pointed.
+        Otherwise the first duplicate is re-synced as a full copy and the rest point at it.
+        Re-pointed references get their sp_duplicate_of metadata and sidecar (or manifest
+        entry, through sidecar_sink) rewritten as well as their state record.
+        """
+        duplicates = self.state_store.get_duplicates(target.scope, old_blob_key)
+        if not duplicates:
+            return
+        if new_blob_key:
+            self._repoint_duplicates(target, duplicates, new_blob_key, sidecar_sink)
+            return
+        
+        promoted = duplicates[0]
+        logger.info(f"Promoting {promoted['blob_key']} to full copy ({len(duplicates)} reference(s) to {old_blob_key})")
+        try:
+            item = self.graph_get(
+                f"{self.config.graph_base_url}{self._drive_item_path(target, promoted['drive_id'], promoted['item_id'])}"
+            )
+            self.state_store.set_duplicate_of(target.scope, promoted["item_id"], None)
+            success, message = self.process_sharepoint_item(
+                item, skip_unchanged=False, target=target, sidecar_sink=sidecar_sink, metrics=metrics
+            )
+        except Exception as e:
+            success, message = False, str(e)
+        if not success:
+            logger.error(f"❌ Failed to promote duplicate {promoted['blob_key']}: {message}")
+            return
+        self._repoint_duplicates(target, duplicates[1:], promoted["blob_key"], sidecar_sink)
+    
+    def _repoint_duplicates(self, target: SyncTarget, duplicates: List[Dict[str, Any]], new_blob_key: str,
+                            sidecar_sink: Optional[Callable[[Dict[str, Any]], None]] = None) -> None:
+        """Point reference blobs at new_blob_key: state record, blob metadata and sidecar."""
+        if not duplicates:
+            return
+        urls = [
+            f"{self._drive_item_path(target, duplicate['drive_id'], duplicate['item_id'])}"
+            "?$select=id,name,webUrl,eTag,cTag,lastModifiedDateTime,size,file,parentReference,sharepointIds"
+            for duplicate in duplicates
+        ]
+        try:
+            responses = self.graph.batch_get(urls)
+        except Exception as e:
+            logger.warning(f"Could not fetch duplicates of {new_blob_key}: {e}")
+            responses = [{"status": 0, "body": None}] * len(duplicates)
+        
+        for duplicate, response in zip(duplicates, responses):
+            self.state_store.set_duplicate_of(target.scope, duplicate["item_id"], new_blob_key)
+            item = response.get("body")
+            if response["status"] != 200 or not item:
+                logger.error(f"❌ Could not re-point {duplicate['blob_key']} to {new_blob_key}: HTTP {response['status']}")
+                continue
+            try:
+                drive_id = item.get("parentReference", {}).get("driveId", duplicate["drive_id"])
+                metadata = self._blob_metadata(item, drive_id)
+                if duplicate.get("content_hash"):
+                    metadata["sp_content_hash"] = duplicate["content_hash"]
+                metadata.update({"sp_duplicate_of": new_blob_key, "AzureSearch_Skip": "true"})
+                blob_client = self.blob_service_client.get_blob_client(
+                    container=target.container, blob=duplicate["blob_key"]
+                )
+                self._storage_call(blob_client.set_blob_metadata, metadata)
+            except Exception as e:
+                logger.error(f"❌ Could not re-point {duplicate['blob_key']} to {new_blob_key}: {e}")
+                continue
+            sidecar_data = self._sidecar_data(item, duplicate["blob_key"])
+            sidecar_data["duplicateOf"] = new_blob_key
+            if self.config.sidecar_mode == "blob":
+                self.upload_sidecar(duplicate["blob_key"], sidecar_data, container=target.container)
+            elif self.config.sidecar_mode == "manifest" and sidecar_sink:
+                sidecar_sink(sidecar_data)
+    
+    def _blob_metadata(self, item: Dict[str, Any], drive_id: str) -> Dict[str, str]:
+        """Blob metadata describing a driveItem (Azure requires lowercase keys)."""
+        metadata = {
+            "source_url": item["webUrl"],
+            "sp_item_id": item["id"],
+            "sp_drive_id": drive_id,
+            "sp_etag": item.get("eTag", ""),
+            "sp_ctag": item.get("cTag", ""),
+            "sp_mtime": item.get("lastModifiedDateTime", ""),
+            "sp_file_name": item["name"]
+        }
+        if self.config.sidecar_mode == "metadata":
+            # Fold the remaining sidecar fields into metadata instead of a second blob
+            sharepoint_ids = item.get("sharepointIds", {})
+            metadata.update({
+                "sp_size": str(item.get("size", "")),
+                "sp_site_id": sharepoint_ids.get("siteId", ""),
+                "sp_list_id": sharepoint_ids.get("listId", ""),
+                "sp_list_item_id": sharepoint_ids.get("listItemId", "")
+            })
+        return metadata
+    
+    @staticmethod
+    def _sidecar_data(item: Dict[str, Any], blob_key: str) -> Dict[str, Any]:
+        return {
+            "originalUrl": item["webUrl"],
+            "name": item["name"],
+            "lastModified": item.get("lastModifiedDateTime"),
+            "size": item.get("size"),
+            "sharepointIds": item.get("sharepointIds", {}),
+            "blobKey": blob_key
+        }
+    
+    def process_sharepoint_item(self, item: Dict[str, Any], skip_unchanged: Optional[bool] = None,
+                                target: Optional[SyncTarget] = None,
+                                sidecar_sink: Optional[Callable[[Dict[str, Any]], None]] = None,
+                                metrics: Optional[SyncMetrics] = None) -> Tuple[bool, str]:
         """
         Process a single SharePoint item (file).
+        
+        Parameters:
+            skip_unchanged: Skip download/upload when the existing blob has the same
+                cTag/eTag (defaults to config.sync_skip_unchanged).
+            target: Sync target the item belongs to (defaults to the .env folder).
+            sidecar_sink: Receives the sidecar data in "manifest" sidecar mode.
+            metrics: Run metrics receiving stage times, bytes and the file's latency.
+        
         Returns (success, message).
         """
+        if skip_unchanged is None:
+            skip_unchanged = self.config.sync_skip_unchanged
+        target = target or self.default_target
+        metrics = metrics or SyncMetrics()
+        started = time.perf_counter()
         try:
             # Skip folders
             if item.get("folder"):
                 return True, "Skipped folder"
             
             name = item["name"]
-            web_url = item["webUrl"]
             item_id = item["id"]
             
             # Build blob key
@@ -303,39 +1308,94 @@ class SharePointSync:
             parent_path = parent_ref.get("path", "")
             blob_key = self.get_safe_blob_key(parent_path, name)
             
+            if skip_unchanged and self.is_blob_unchanged(blob_key, item, target):
+                logger.info(f"Unchanged, skipping: {name}")
+                return True, f"Skipped unchanged {name}"
+            
             logger.info(f"Processing file: {name} -> {blob_key}")
             
             # Get download URL
-            drive_id = parent_ref.get("driveId", self.config.drive_id)
-            content_url = f"https://graph.microsoft.com/v1.0/drives/{drive_id}/items/{item_id}/content"
+            drive_id = parent_ref.get("driveId", target.drive_id)
+            content_url = f"{self.config.graph_base_url}/drives/{drive_id}/items/{item_id}/content"
             
-            # Download file content
-            content_stream = self.stream_download(content_url)
+            metadata = self._blob_metadata(item, drive_id)
+            record = self.state_store.get_item(target.scope, item_id)
             
-            # Prepare blob metadata (Azure requires lowercase keys)
-            metadata = {
-                "source_url": web_url,
-                "sp_item_id": item_id,
-                "sp_drive_id": drive_id,
-                "sp_etag": item.get("eTag", ""),
-                "sp_mtime": item.get("lastModifiedDateTime", ""),
-                "sp_file_name": name
-            }
+            # Identical content already stored under another path becomes an empty reference blob
+            content_hash = get_content_hash(item) if self.config.sync_dedup_content else None
+            duplicate_of = None
+            # A path that already holds a full (indexed) copy keeps getting full copies: the
+            # indexer skips reference blobs, so turning it into one would leave its old document behind
+            holds_full_copy = record and record["blob_key"] == blob_key and not record.get("duplicate_of")
+            if content_hash:
+                metadata["sp_content_hash"] = content_hash
+                canonical = self.state_store.find_canonical_item(target.scope, content_hash, item_id)
+                if canonical and canonical["blob_key"] != blob_key and not holds_full_copy:
+                    duplicate_of = canonical["blob_key"]
             
-            # Upload to blob storage
-            self.upload_blob(blob_key, content_stream, metadata)
+            # Let storage pull the bytes itself when Graph handed out a pre-authenticated URL
+            copied = False
+            download_url = item.get("@microsoft.graph.downloadUrl")
+            if duplicate_of:
+                # AzureSearch_Skip makes the blob indexer ignore the reference, so the
+                # content is extracted, chunked and embedded once
+                metadata.update({"sp_duplicate_of": duplicate_of, "AzureSearch_Skip": "true"})
+                with metrics.time_stage("blob_upload"):
+                    self.upload_blob(blob_key, iter(()), metadata, container=target.container)
+                copied = True
+            elif self.config.sync_server_side_copy and download_url and item.get("size") is not None:
+                try:
+                    with metrics.time_stage("server_copy"):
+                        self.copy_blob_from_url(blob_key, download_url, item["size"], metadata, container=target.container)
+                    metrics.add_bytes("copied", item["size"])
+                    copied = True
+                except Exception as e:
+                    logger.warning(f"Server-side copy failed for {name}, streaming instead: {e}")
             
-            # Create and upload sidecar JSON
-            sidecar_data = {
-                "originalUrl": web_url,
-                "name": name,
-                "lastModified": item.get("lastModifiedDateTime"),
-                "size": item.get("size"),
-                "sharepointIds": item.get("sharepointIds", {}),
-                "blobKey": blob_key
-            }
-            self.upload_sidecar(blob_key, sidecar_data)
+            if not copied:
+                # Download file content and upload to blob storage; large files as parallel ranges
+                size = item.get("size") or 0
+                threshold = self.config.download_parallel_threshold_mb * 1024 * 1024
+                if threshold and size >= threshold:
+                    try:
+                        self._transfer(self.parallel_download(content_url, size), blob_key, metadata, target, metrics)
+                    except FileChangedError as e:
+                        # Ranges can't mix versions; one stream reads whichever version is current.
+                        # The blob's uncommitted blocks are simply replaced by the new upload.
+                        logger.warning(f"{name} changed during the ranged download ({e}); downloading it as one stream")
+                        self._transfer(self.stream_download(content_url), blob_key, metadata, target, metrics)
+                else:
+                    self._transfer(self.stream_download(content_url), blob_key, metadata, target, metrics)
             
+            # Create sidecar JSON (own blob, or handed to the page's manifest)
+            sidecar_data = self._sidecar_data(item, blob_key)
+            if duplicate_of:
+                sidecar_data["duplicateOf"] = duplicate_of
+            if record and record["blob_key"] != blob_key and self.config.sidecar_mode == "manifest":
+                # Lets manifest readers drop the entry for the old path
+                sidecar_data["previousBlobKey"] = record["blob_key"]
+            if self.config.sidecar_mode == "blob":
+                with metrics.time_stage("sidecar_upload"):
+                    self.upload_sidecar(blob_key, sidecar_data, container=target.container)
+            elif self.config.sidecar_mode == "manifest" and sidecar_sink:
+                sidecar_sink(sidecar_data)
+            
+            # A renamed/moved item leaves its previous blob behind; remove it
+            if record and record["blob_key"] != blob_key:
+                self.delete_blobs([record["blob_key"]], container=target.container)
+            self._record_item(item, blob_key, target, content_hash=content_hash, duplicate_of=duplicate_of)
+            
+            if record and record.get("content_hash") and not record.get("duplicate_of"):
+                # This item held the full content for others: follow a move, replace on change
+                if record["content_hash"] == content_hash and not duplicate_of:
+                    if record["blob_key"] != blob_key:
+                        self._reassign_duplicates(target, record["blob_key"], blob_key, sidecar_sink, metrics)
+                else:
+                    self._reassign_duplicates(target, record["blob_key"], sidecar_sink=sidecar_sink, metrics=metrics)
+            
+            metrics.observe_file(time.perf_counter() - started)
+            if duplicate_of:
+                return True, f"Deduplicated {name} (same content as {duplicate_of})"
             return True, f"Successfully processed {name}"
             
         except Exception as e:
@@ -343,85 +1403,375 @@ class SharePointSync:
             logger.error(error_msg)
             return False, error_msg
     
-    def sync_sharepoint_folder(self) -> Dict[str, Any]:
+    def _transfer(self, content_stream: Iterator[bytes], blob_key: str, metadata: Dict[str, str],
+                  target: SyncTarget, metrics: SyncMetrics) -> None:
+        """Upload a download stream to blob_key, splitting the time between download and upload."""
+        # Time the upload spends waiting on the download counts as download
+        timed_stream = TimedIterator(content_stream)
+        upload_started = time.perf_counter()
+        uploaded = self.upload_blob(blob_key, timed_stream, metadata, container=target.container)
+        metrics.record_stage("download", timed_stream.seconds)
+        metrics.record_stage("blob_upload", time.perf_counter() - upload_started - timed_stream.seconds)
+        metrics.add_bytes("downloaded", timed_stream.bytes)
+        metrics.add_bytes("uploaded", uploaded)
+    
+    def _uses_site_drive(self, target: SyncTarget) -> bool:
+        return target is self.default_target or not target.drive_id
+    
+    def resolve_drive_id(self, target: SyncTarget) -> str:
+        """Return the id of the drive a target's delta feed actually reads."""
+        if not self._uses_site_drive(target):
+            return target.drive_id
+        return self.graph_get(f"{self.config.graph_base_url}/sites/{target.site_id}/drive?$select=id")["id"]
+    
+    def build_delta_url(self, target: SyncTarget) -> str:
+        """Build the initial delta URL for a target's folder."""
+        if self._uses_site_drive(target):
+            # For delegated permissions, use the site's default document library
+            drive_url = f"{self.config.graph_base_url}/sites/{target.site_id}/drive"
+        else:
+            drive_url = f"{self.config.graph_base_url}/drives/{target.drive_id}"
+        
+        # If folder path exists, try to target that specific folder
+        if target.folder_path and target.folder_path.strip():
+            return f"{drive_url}/root:/{target.folder_path.strip()}:/delta"
+        # Access entire drive root
+        return f"{drive_url}/root/delta"
+    
+    def iter_delta_pages(self, delta_url: str, prefetch: Optional[int] = None,
+                         metrics: Optional[SyncMetrics] = None) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Yield (page_url, page) for each delta page in order, following @odata.nextLink.
+        
+        A pager thread fetches up to `prefetch` pages (default DELTA_PREFETCH_PAGES)
+        ahead into a bounded queue, so the page fetch round-trip overlaps with the
+        caller handing out the previous page's items. With prefetch 0 pages are
+        fetched inline. Fetch errors are re-raised in the caller; closing the
+        generator stops the pager. Fetch time is recorded as the "graph_paging" stage of metrics.
+        """
+        prefetch = self.config.delta_prefetch_pages if prefetch is None else prefetch
+        metrics = metrics or SyncMetrics()
+        if prefetch <= 0:
+            while delta_url:
+                logger.info(f"Fetching delta page: {delta_url}")
+                with metrics.time_stage("graph_paging"):
+                    data = self.graph_get(delta_url)
+                yield delta_url, data
+                delta_url = data.get("@odata.nextLink")
+            return
+        
+        pages = queue.Queue(maxsize=prefetch)
+        stop = threading.Event()
+        
+        def _put(entry) -> None:
+            # Wait for room, but give up once the consumer has gone away
+            while not stop.is_set():
+                try:
+                    pages.put(entry, timeout=0.5)
+                    return
+                except queue.Full:
+                    continue
+        
+        def _pager(url: str) -> None:
+            try:
+                while url and not stop.is_set():
+                    logger.info(f"Fetching delta page: {url}")
+                    with metrics.time_stage("graph_paging"):
+                        data = self.graph_get(url)
+                    _put((url, data))
+                    url = data.get("@odata.nextLink")
+                _put(None)
+            except Exception as e:
+                _put(e)
+        
+        pager = threading.Thread(target=carry_counters(_pager), args=(delta_url,), name="delta-pager", daemon=True)
+        pager.start()
+        try:
+            while True:
+                entry = pages.get()
+                if entry is None:
+                    return
+                if isinstance(entry, Exception):
+                    raise entry
+                yield entry
+        finally:
+            stop.set()
+    
+    def sync_targets(self, targets: List[SyncTarget], concurrency: Optional[int] = None,
+                     force: bool = False, resume: bool = False,
+                     check_storage: bool = True) -> Dict[str, Dict[str, Any]]:
+        """
+        Sync several (site, drive, folder, container) targets concurrently in this process.
+        
+        Each target walks its own delta feed with its own cursor and worker pool, while
+        the Graph connection pool, token and rate limiters are shared.
+        check_storage=False skips the container access test (callers that already ran it).
+        Returns {target name: summary}.
+        """
+        if check_storage:
+            self.check_storage_access(targets)
+        
+        logger.info(f"Syncing {len(targets)} targets: {', '.join(t.name for t in targets)}")
+        self.start_token_refresher()
+        summaries = {}
+        with ThreadPoolExecutor(max_workers=max(1, len(targets)), thread_name_prefix="sp-target") as executor:
+            futures = {
+                executor.submit(self.sync_sharepoint_folder, concurrency, force, resume, target): target
+                for target in targets
+            }
+            for future, target in futures.items():
+                summaries[target.name] = future.result()
+        return summaries
+    
+    def sync_sharepoint_folder(self, concurrency: Optional[int] = None, force: bool = False,
+                               resume: bool = False, target: Optional[SyncTarget] = None) -> Dict[str, Any]:
         """
         Sync SharePoint folder to Azure Blob Storage using delta API.
+        
+        Files are handed to a bounded pool of worker threads so downloads and
+        uploads overlap; delta pages keep being fetched while workers drain
+        the queued items. Each page whose items have all been handled is checkpointed
+        in the state store so an interrupted enumeration can be resumed.
+        
+        Files that fail are recorded in the state store and retried by id on later
+        runs, so they never hold back the delta link. A delta link Graph refuses
+        with 410 Gone is dropped and the folder enumerated again from scratch.
+        
+        Parameters:
+            concurrency: Number of files transferred in parallel (defaults to config.sync_concurrency).
+            force: Re-upload every file even if the blob already matches its cTag/eTag.
+            resume: Continue an interrupted enumeration from its last checkpointed page.
+            target: Folder/container to sync (defaults to the folder configured in .env).
+        
         Returns summary of the sync operation.
         """
-        logger.info("Starting SharePoint folder sync...")
+        concurrency = max(1, concurrency or self.config.sync_concurrency)
+        skip_unchanged = self.config.sync_skip_unchanged and not force
+        target = target or self.default_target
+        scope = target.scope
+        logger.info(f"Starting SharePoint folder sync for '{target.name}' (concurrency={concurrency})...")
+        self.start_token_refresher()
         
         # Load delta state
-        state = self.load_delta_state()
+        state = self.load_delta_state(target)
         
         # Build initial delta URL
         delta_url = state.get("delta_url")
         if not delta_url:
-            # For delegated permissions, try a simpler approach with drive items
-            site_id = self.config.site_id
-            
-            # If folder path exists, try to target that specific folder
-            if self.config.folder_path and self.config.folder_path.strip():
-                # Use drive items with path for delegated permissions
-                folder_path = self.config.folder_path.strip()
-                delta_url = (
-                    f"https://graph.microsoft.com/v1.0/sites/{site_id}/"
-                    f"drive/root:/{folder_path}:/delta"
-                )
-            else:
-                # Access entire drive root with delegated permissions
-                delta_url = (
-                    f"https://graph.microsoft.com/v1.0/sites/{site_id}/"
-                    f"drive/root/delta"
-                )
+            delta_url = self.build_delta_url(target)
             logger.info("Starting full sync (no previous delta state)")
         else:
             logger.info("Continuing incremental sync from previous state")
         
+        page = 0
+        resume_point = self.state_store.get_resume_point(scope)
+        if resume and resume_point:
+            page, delta_url = resume_point
+            logger.info(f"Resuming interrupted enumeration after checkpointed page {page}")
+        elif resume:
+            logger.info("No checkpoint to resume from; running a normal sync")
+        elif resume_point:
+            logger.warning(
+                f"Discarding checkpoint of an interrupted enumeration (page {resume_point[0]}); "
+                "use 'sync --resume' to continue from it instead"
+            )
+        # Cursors past the starting page belong to an earlier, unfinished enumeration
+        self.state_store.clear_pages(scope, after_page=page)
+        resumed_from_page = page
+        
+        if skip_unchanged:
+            self.seed_item_records(target)
+        
+        retry_items, given_up = self.fetch_failed_items(target)
+        if retry_items:
+            logger.info(f"Retrying {len(retry_items)} file(s) that failed on earlier runs")
+        if given_up:
+            logger.warning(f"{given_up} file(s) failed {self.config.sync_max_item_attempts} times; "
+                           "they are retried only when they change")
+        # Successes among these clear their failure record
+        failed_ids = {record["item_id"] for record in self.state_store.get_failed_items(scope)}
+        max_attempts = max(1, self.config.sync_max_item_attempts)
+        
+        started_at = time.time()
+        metrics = SyncMetrics()
         total_files = 0
-        processed_files = 0
+        counts = {"processed": 0, "skipped": 0, "deleted": 0, "filtered": 0, "filtered_bytes": 0,
+                  "deduplicated": 0, "transferred": 0, "transferred_bytes": 0}
         errors = []
+        results_lock = threading.Lock()
+        # Cap queued + running items so a huge delta feed doesn't pile up in memory
+        in_flight = threading.BoundedSemaphore(concurrency * 2)
+        # Items still outstanding per page; a page is committed once it drops to zero.
+        # Failed items are recorded for retry by id, so they don't hold their page back.
+        page_pending: Dict[int, int] = {}
+        # "manifest" sidecar mode: sidecars gathered per page, written as one JSONL blob
+        page_sidecars: Dict[int, List[Dict[str, Any]]] = {}
+        # Millisecond resolution so back-to-back watch cycles don't share a manifest folder
+        run_id = time.strftime("%Y%m%dT%H%M%S", time.gmtime()) + f"{int(time.time() * 1000) % 1000:03d}Z"
+        
+        def _collect_sidecar(sidecar_data: Dict[str, Any], page: int) -> None:
+            with results_lock:
+                page_sidecars.setdefault(page, []).append(sidecar_data)
+        
+        def _finish_page_item(page: int) -> None:
+            sidecars = []
+            with results_lock:
+                page_pending[page] -= 1
+                finished = page_pending[page] == 0
+                if finished:
+                    del page_pending[page]
+                    sidecars = page_sidecars.pop(page, [])
+            if finished and sidecars:
+                with metrics.time_stage("sidecar_upload"):
+                    self.upload_manifest(
+                        f"{MANIFEST_PREFIX}/{target.name}/{run_id}/page-{page:05d}.jsonl",
+                        sidecars, container=target.container
+                    )
+            if finished and page != RETRY_PAGE:
+                self.state_store.complete_page(scope, page)
+        
+        def _on_item_done(future, page: int, item: Dict[str, Any]) -> None:
+            in_flight.release()
+            # process_sharepoint_item never raises; failures come back as (False, message)
+            success, message = future.result()
+            with results_lock:
+                if success:
+                    counts["processed"] += 1
+                    if message.startswith("Skipped"):
+                        counts["skipped"] += 1
+                    elif message.startswith("Deduplicated"):
+                        counts["deduplicated"] += 1
+                    else:
+                        counts["transferred"] += 1
+                        counts["transferred_bytes"] += item.get("size") or 0
+                else:
+                    errors.append(message)
+            if success and item["id"] in failed_ids:
+                self.state_store.clear_failed_item(scope, item["id"])
+            elif not success:
+                drive_id = item.get("parentReference", {}).get("driveId", target.drive_id)
+                attempts = self.state_store.record_failed_item(scope, item["id"], drive_id, message)
+                if attempts == max_attempts:
+                    logger.warning(f"Giving up on {item.get('name', item['id'])} after {attempts} failed attempts "
+                                   "until it changes again")
+            _finish_page_item(page)
+        
+        def _handle_items(items: List[Dict[str, Any]], page: int, executor: ThreadPoolExecutor) -> None:
+            nonlocal total_files
+            deleted_items = [item for item in items if item.get("deleted") and not item.get("folder")]
+            file_items = []
+            for item in items:
+                if item.get("folder") or item.get("deleted"):
+                    continue
+                reason = self.file_filter.skip_reason(item)
+                if reason:
+                    logger.debug(f"Filtered {item.get('name')}: {reason}")
+                    counts["filtered"] += 1
+                    counts["filtered_bytes"] += item.get("size") or 0
+                    if item["id"] in failed_ids:
+                        self.state_store.clear_failed_item(scope, item["id"])
+                else:
+                    file_items.append(item)
+            total_files += len(file_items)
+            
+            # Hold the page open while its items are being submitted
+            with results_lock:
+                page_pending[page] = 1
+            
+            # Apply the page's deletions before its uploads so a re-created path isn't removed
+            if deleted_items:
+                with metrics.time_stage("delete"):
+                    removed, delete_errors = self.process_deleted_items(
+                        deleted_items, target,
+                        functools.partial(_collect_sidecar, page=page)
+                        if self.config.sidecar_mode == "manifest" else None,
+                        metrics
+                    )
+                with results_lock:
+                    counts["deleted"] += removed
+                    errors.extend(delete_errors)
+            
+            if self.config.sync_fetch_sharepoint_ids:
+                self.fetch_sharepoint_ids(file_items, target)
+            
+            for item in file_items:
+                in_flight.acquire()
+                with results_lock:
+                    page_pending[page] += 1
+                future = executor.submit(
+                    carry_counters(self.process_sharepoint_item), item, skip_unchanged, target,
+                    functools.partial(_collect_sidecar, page=page), metrics
+                )
+                future.add_done_callback(functools.partial(_on_item_done, page=page, item=item))
+            _finish_page_item(page)
+        
+        def _delta_pages() -> Iterator[Tuple[str, Dict[str, Any]]]:
+            try:
+                yield from self.iter_delta_pages(delta_url, metrics=metrics)
+            except DeltaResyncRequired as e:
+                logger.warning(f"🔁 Graph refused the saved delta state ({e}); enumerating the folder again")
+                self.state_store.clear_delta_state(scope)
+                yield from self.iter_delta_pages(self.build_delta_url(target), metrics=metrics)
         
         try:
-            while delta_url:
-                logger.info(f"Fetching delta page: {delta_url}")
-                data = self.graph_get(delta_url)
-                
-                items = data.get("value", [])
-                total_files += len([item for item in items if not item.get("folder")])
-                
-                for item in items:
-                    if not item.get("folder"):  # Process only files
-                        success, message = self.process_sharepoint_item(item)
-                        if success:
-                            processed_files += 1
-                        else:
-                            errors.append(message)
-                
-                # Get next URL
-                delta_url = data.get("@odata.nextLink")
-                
-                # If this is the final page, save the delta link
-                if "@odata.deltaLink" in data:
-                    final_delta_url = data["@odata.deltaLink"]
-                    self.save_delta_state({"delta_url": final_delta_url})
-                    logger.info("Sync completed. Delta state saved for next run.")
-                    break
+            # Requests, retries and throttles on this run's threads count against this run only
+            with bind_counters(metrics.counters), \
+                    ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix=f"sp-sync-{target.name}") as executor:
+                if retry_items:
+                    _handle_items(retry_items, RETRY_PAGE, executor)
+                # The next page is fetched in the background while this one's items are queued
+                for page_url, data in _delta_pages():
+                    page += 1
+                    self.state_store.record_page(scope, page, page_url, data.get("@odata.nextLink"))
+                    _handle_items(data.get("value", []), page, executor)
+                    
+                    # If this is the final page, save the delta link once queued items have finished
+                    if "@odata.deltaLink" in data:
+                        final_delta_url = data["@odata.deltaLink"]
+                        executor.shutdown(wait=True)
+                        # Failed files are in the state store and retried by id, so the link always advances
+                        self.save_delta_state({"delta_url": final_delta_url}, target)
+                        if errors:
+                            logger.warning(f"Sync completed with {len(errors)} error(s); failed files are retried next run")
+                        logger.info("Sync completed. Delta state saved for next run.")
+                        break
         
         except Exception as e:
             error_msg = f"Sync failed: {e}"
             logger.error(error_msg)
             errors.append(error_msg)
         
+        if self.config.sidecar_mode == "manifest":
+            self.prune_manifests(target)
+        
+        processed_files = counts["processed"]
+        duration = time.time() - started_at
+        if counts["transferred"]:
+            # Measured throughput feeds the time estimate of 'sync --plan'
+            self.state_store.record_run(scope, started_at, duration, counts["transferred"], counts["transferred_bytes"])
+        
         # Return summary
         summary = {
+            "container": target.container,
             "total_files": total_files,
             "processed_files": processed_files,
+            "skipped_files": counts["skipped"],
+            "deleted_files": counts["deleted"],
+            "filtered_files": counts["filtered"],
+            "filtered_bytes": counts["filtered_bytes"],
+            "deduplicated_files": counts["deduplicated"],
+            # Blobs written or removed: what the container's indexers have to pick up
+            "changed_files": processed_files - counts["skipped"] + counts["deleted"],
+            "transferred_bytes": counts["transferred_bytes"],
+            "duration_seconds": duration,
+            "resumed_from_page": resumed_from_page,
             "errors": errors,
-            "success_rate": (processed_files / total_files * 100) if total_files > 0 else 0
+            "success_rate": (processed_files / total_files * 100) if total_files > 0 else 0,
+            "metrics": metrics.report()
         }
         
-        logger.info(f"Sync summary: {processed_files}/{total_files} files processed successfully")
+        logger.info(f"Sync summary ({target.name}): {processed_files}/{total_files} files processed successfully ({counts['skipped']} unchanged, {counts['deleted']} deleted)")
         if errors:
             logger.warning(f"{len(errors)} errors occurred during sync")
         
-        return summary
\ No newline at end of file
+        return summary
@@ -0,0 +1,198 @@
+import math
+import time
+import threading
+import functools
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+# Stages a sync run spends its time in (seconds are summed over all workers)
+STAGES = ("graph_paging", "download", "blob_upload", "server_copy", "sidecar_upload", "delete")
+
+METRIC_PREFIX = "sharepoint_sync"
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list (0 for an empty one)."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class Counters:
+    """Thread-safe named counters (requests, retries, throttled answers) of one sync run."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values: Dict[str, int] = {}
+
+    def add(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self._values[name] = self._values.get(name, 0) + amount
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._values)
+
+
+# The Graph client and storage helpers are shared by concurrently running targets, so
+# events are counted against the run bound to the calling thread rather than the client
+_bound = threading.local()
+
+
+@contextmanager
+def bind_counters(counters: Optional[Counters]):
+    """Count events raised on this thread against counters for the duration of the block."""
+    previous = getattr(_bound, "counters", None)
+    _bound.counters = counters
+    try:
+        yield
+    finally:
+        _bound.counters = previous
+
+
+def count_event(name: str, amount: int = 1) -> None:
+    """Add to the counters bound to the calling thread (ignored outside a sync run)."""
+    counters = getattr(_bound, "counters", None)
+    if counters is not None:
+        counters.add(name, amount)
+
+
+def carry_counters(fn: Callable) -> Callable:
+    """Wrap fn so that, on whatever thread it runs, it counts against the caller's current counters."""
+    counters = getattr(_bound, "counters", None)
+
+    @functools.wraps(fn)
+    def _run(*args, **kwargs):
+        with bind_counters(counters):
+            return fn(*args, **kwargs)
+    return _run
+
+
+class TimedIterator:
+    """Wraps a byte-chunk iterator, accumulating the time spent waiting for chunks and their size."""
+
+    def __init__(self, iterator: Iterator[bytes]):
+        self._iterator = iter(iterator)
+        self.seconds = 0.0
+        self.bytes = 0
+
+    def __iter__(self) -> "TimedIterator":
+        return self
+
+    def __next__(self) -> bytes:
+        started = time.perf_counter()
+        try:
+            chunk = next(self._iterator)
+        finally:
+            self.seconds += time.perf_counter() - started
+        self.bytes += len(chunk)
+        return chunk
+
+
+class SyncMetrics:
+    """
+    Per-run instrumentation for one sync target: time per stage, bytes moved,
+    retry/throttle counts and per-file latency percentiles.
+
+    Stage times are summed across worker threads, so with concurrency they add
+    up to more than the wall-clock duration; compare them with each other to see
+    where a run spent its effort.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+        self.stage_seconds = {stage: 0.0 for stage in STAGES}
+        self.stage_calls = {stage: 0 for stage in STAGES}
+        self.bytes = {"downloaded": 0, "uploaded": 0, "copied": 0}
+        self.file_seconds: List[float] = []
+        self.counters = Counters()
+
+    def record_stage(self, stage: str, seconds: float, calls: int = 1) -> None:
+        with self._lock:
+            self.stage_seconds[stage] += seconds
+            self.stage_calls[stage] += calls
+
+    @contextmanager
+    def time_stage(self, stage: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_stage(stage, time.perf_counter() - started)
+
+    def add_bytes(self, direction: str, amount: int) -> None:
+        with self._lock:
+            self.bytes[direction] += amount
+
+    def observe_file(self, seconds: float) -> None:
+        with self._lock:
+            self.file_seconds.append(seconds)
+
+    def report(self) -> Dict[str, Any]:
+        """Return the run's metrics as a JSON-serializable dict."""
+        with self._lock:
+            latencies = sorted(self.file_seconds)
+            return {
+                "duration_seconds": time.time() - self.started_at,
+                "stages": {
+                    stage: {"seconds": round(self.stage_seconds[stage], 3), "calls": self.stage_calls[stage]}
+                    for stage in STAGES
+                },
+                "bytes": dict(self.bytes),
+                "counters": self.counters.snapshot(),
+                "file_latency_seconds": {
+                    "count": len(latencies),
+                    "p50": round(percentile(latencies, 50), 3),
+                    "p95": round(percentile(latencies, 95), 3),
+                    "p99": round(percentile(latencies, 99), 3),
+                    "max": round(latencies[-1], 3) if latencies else 0.0,
+                    "sum": round(sum(latencies), 3),
+                },
+            }
+
+
+def to_openmetrics(reports: Dict[str, Dict[str, Any]]) -> str:
+    """Render {target name: SyncMetrics.report()} as Prometheus/OpenMetrics text."""
+    def _label(value: str) -> str:
+        return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    families = {
+        "stage_seconds": ("counter", "Time spent per sync stage, summed over workers"),
+        "stage_calls": ("counter", "Operations per sync stage"),
+        "bytes": ("counter", "Bytes moved by sync"),
+        "events": ("counter", "Requests, retries and throttled (429/503) answers during sync"),
+        "file_latency_seconds": ("summary", "Per-file processing latency"),
+        "duration_seconds": ("gauge", "Wall-clock duration of the sync run"),
+    }
+    lines: Dict[str, List[str]] = {family: [] for family in families}
+    for target, report in reports.items():
+        target_label = f'target="{_label(target)}"'
+        for stage, values in report["stages"].items():
+            lines["stage_seconds"].append(
+                f'{METRIC_PREFIX}_stage_seconds_total{{{target_label},stage="{stage}"}} {values["seconds"]}')
+            lines["stage_calls"].append(
+                f'{METRIC_PREFIX}_stage_calls_total{{{target_label},stage="{stage}"}} {values["calls"]}')
+        for direction, value in report["bytes"].items():
+            lines["bytes"].append(f'{METRIC_PREFIX}_bytes_total{{{target_label},direction="{direction}"}} {value}')
+        for event, value in sorted(report["counters"].items()):
+            lines["events"].append(f'{METRIC_PREFIX}_events_total{{{target_label},event="{_label(event)}"}} {value}')
+        latency = report["file_latency_seconds"]
+        for quantile, key in (("0.5", "p50"), ("0.95", "p95"), ("0.99", "p99")):
+            lines["file_latency_seconds"].append(
+                f'{METRIC_PREFIX}_file_latency_seconds{{{target_label},quantile="{quantile}"}} {latency[key]}')
+        lines["file_latency_seconds"].append(
+            f'{METRIC_PREFIX}_file_latency_seconds_count{{{target_label}}} {latency["count"]}')
+        lines["file_latency_seconds"].append(
+            f'{METRIC_PREFIX}_file_latency_seconds_sum{{{target_label}}} {latency["sum"]}')
+        lines["duration_seconds"].append(
+            f'{METRIC_PREFIX}_duration_seconds{{{target_label}}} {round(report["duration_seconds"], 3)}')
+
+    output = []
+    for family, (metric_type, help_text) in families.items():
+        output.append(f"# TYPE {METRIC_PREFIX}_{family} {metric_type}")
+        output.append(f"# HELP {METRIC_PREFIX}_{family} {help_text}")
+        output.extend(lines[family])
+    output.append("# EOF")
+    return "\n".join(output) + "\n"
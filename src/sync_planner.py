@@ -0,0 +1,153 @@
+import os
+import logging
+from typing import Any, Dict, Optional
+from config.settings import config
+from src.sharepoint_sync import SharePointSync, SyncTarget, get_content_hash
+from vertical_recommender import CATEGORIES, categorize_extension
+
+logger = logging.getLogger(__name__)
+
+# Rough share of a file's bytes that ends up as extracted text, per category
+TEXT_RATIO = {
+    "CODE": 1.0,
+    "DOCUMENTS": 0.1,
+    "STRUCTURED": 1.0,
+    "SPREADSHEETS": 0.2,
+    "MEDIA": 0.0,
+    "UNKNOWN": 0.0,
+}
+
+# Average characters per embedding token for English text
+CHARS_PER_TOKEN = 4
+
+
+class SyncPlanner:
+    """
+    Dry run of `sync`: walks the same delta feed without transferring any content.
+
+    Items are classified the way a real sync would treat them (pre-download
+    filters, unchanged cTag/eTag in the state store, content-hash duplicates when
+    dedup is on, deletions). Whatever would be transferred is broken down by
+    extension and by vertical_recommender category. Transfer time comes from the
+    throughput recorded by previous syncs. Embedding tokens are estimated from the
+    text share of each category and its chunk overlap.
+
+    Nothing is written: neither the delta link nor page cursors or item records.
+    """
+
+    def __init__(self, sp_sync: SharePointSync):
+        self.sp_sync = sp_sync
+
+    def plan(self, target: Optional[SyncTarget] = None, force: bool = False) -> Dict[str, Any]:
+        """
+        Enumerate the target's delta feed and return the plan.
+
+        Parameters:
+            target: Folder/container to plan (defaults to the folder configured in .env).
+            force: Plan a full re-upload, as `sync --force` would do.
+        """
+        sp_sync = self.sp_sync
+        target = target or sp_sync.default_target
+        delta_url = sp_sync.load_delta_state(target).get("delta_url")
+        mode = "incremental"
+        if not delta_url:
+            delta_url = sp_sync.build_delta_url(target)
+            mode = "full"
+        skip_unchanged = sp_sync.config.sync_skip_unchanged and not force
+        logger.info(f"Planning {mode} sync for '{target.name}' (no content is transferred)...")
+
+        plan = {
+            "target": target.name,
+            "mode": mode,
+            "pages": 0,
+            "files": 0,
+            "transfer_files": 0,
+            "transfer_bytes": 0,
+            "unchanged_files": 0,
+            "filtered_files": 0,
+            "filtered_bytes": 0,
+            "duplicate_files": 0,
+            "duplicate_bytes": 0,
+            "deleted_files": 0,
+            "by_extension": {},
+            "by_category": {},
+        }
+        seen_hashes = set()
+
+        for _, data in sp_sync.iter_delta_pages(delta_url):
+            plan["pages"] += 1
+            for item in data.get("value", []):
+                if item.get("folder"):
+                    continue
+                if item.get("deleted"):
+                    plan["deleted_files"] += 1
+                    continue
+                self._classify(item, target, skip_unchanged, plan, seen_hashes)
+
+        plan.update(self._estimate(plan))
+        return plan
+
+    def _classify(self, item: Dict[str, Any], target: SyncTarget, skip_unchanged: bool,
+                  plan: Dict[str, Any], seen_hashes: set) -> None:
+        sp_sync = self.sp_sync
+        size = item.get("size") or 0
+        plan["files"] += 1
+
+        if sp_sync.file_filter.skip_reason(item):
+            plan["filtered_files"] += 1
+            plan["filtered_bytes"] += size
+            return
+
+        blob_key = sp_sync.get_safe_blob_key(item.get("parentReference", {}).get("path", ""), item["name"])
+        if skip_unchanged and sp_sync.is_blob_unchanged(blob_key, item, target, check_blob=False):
+            plan["unchanged_files"] += 1
+            return
+
+        content_hash = get_content_hash(item) if sp_sync.config.sync_dedup_content else None
+        if content_hash:
+            duplicate = content_hash in seen_hashes or sp_sync.state_store.find_canonical_item(
+                target.scope, content_hash, item["id"]
+            )
+            seen_hashes.add(content_hash)
+            if duplicate:
+                plan["duplicate_files"] += 1
+                plan["duplicate_bytes"] += size
+                return
+
+        ext = os.path.splitext(item["name"])[1].lower() or "(none)"
+        category = categorize_extension(ext)
+        plan["transfer_files"] += 1
+        plan["transfer_bytes"] += size
+        for key, breakdown in (("by_extension", ext), ("by_category", category)):
+            entry = plan[key].setdefault(breakdown, {"files": 0, "bytes": 0})
+            entry["files"] += 1
+            entry["bytes"] += size
+
+    def _estimate(self, plan: Dict[str, Any]) -> Dict[str, Any]:
+        """Estimate embedding tokens/cost per category and the transfer time."""
+        total_tokens = 0
+        for category, entry in plan["by_category"].items():
+            tokens = entry["bytes"] * TEXT_RATIO.get(category, 0.0) / CHARS_PER_TOKEN
+            spec = CATEGORIES.get(category, {})
+            chunk_size, overlap = spec.get("chunk_size", 0), spec.get("overlap", 0)
+            if chunk_size > overlap:
+                # Overlapping chunks embed the overlap twice
+                tokens *= chunk_size / (chunk_size - overlap)
+            entry["estimated_tokens"] = int(tokens)
+            total_tokens += int(tokens)
+
+        throughput = self.sp_sync.state_store.get_throughput()
+        estimated_seconds = None
+        if throughput and plan["transfer_files"]:
+            # Small files are bound by per-file round-trips, large ones by bandwidth
+            estimated_seconds = max(
+                plan["transfer_files"] / throughput["files_per_second"],
+                plan["transfer_bytes"] / throughput["bytes_per_second"] if throughput["bytes_per_second"] else 0
+            )
+
+        return {
+            "estimated_tokens": total_tokens,
+            "estimated_embedding_cost": total_tokens / 1_000_000 * config.embedding_cost_per_million_tokens,
+            "throughput": throughput,
+            "estimated_seconds": estimated_seconds,
+        }
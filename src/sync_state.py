@@ -0,0 +1,315 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from typing import Dict, Any, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS delta_links (
+    scope       TEXT PRIMARY KEY,
+    delta_link  TEXT NOT NULL,
+    updated_at  REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS page_cursors (
+    scope       TEXT NOT NULL,
+    page        INTEGER NOT NULL,
+    page_url    TEXT NOT NULL,
+    next_link   TEXT,
+    completed   INTEGER NOT NULL DEFAULT 0,
+    updated_at  REAL NOT NULL,
+    PRIMARY KEY (scope, page)
+);
+CREATE TABLE IF NOT EXISTS items (
+    scope       TEXT NOT NULL,
+    item_id     TEXT NOT NULL,
+    drive_id    TEXT,
+    blob_key    TEXT NOT NULL,
+    etag        TEXT,
+    ctag        TEXT,
+    size        INTEGER,
+    synced_at   REAL NOT NULL,
+    content_hash TEXT,
+    duplicate_of TEXT,
+    PRIMARY KEY (scope, item_id)
+);
+CREATE TABLE IF NOT EXISTS seeded_scopes (
+    scope       TEXT PRIMARY KEY,
+    seeded_at   REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS failed_items (
+    scope       TEXT NOT NULL,
+    item_id     TEXT NOT NULL,
+    drive_id    TEXT,
+    attempts    INTEGER NOT NULL,
+    last_error  TEXT,
+    updated_at  REAL NOT NULL,
+    PRIMARY KEY (scope, item_id)
+);
+CREATE TABLE IF NOT EXISTS sync_runs (
+    scope       TEXT NOT NULL,
+    started_at  REAL NOT NULL,
+    duration    REAL NOT NULL,
+    files       INTEGER NOT NULL,
+    bytes       INTEGER NOT NULL
+);
+"""
+
+# Columns added after the first release, created on databases that predate them
+ITEM_MIGRATIONS = {
+    "content_hash": "ALTER TABLE items ADD COLUMN content_hash TEXT",
+    "duplicate_of": "ALTER TABLE items ADD COLUMN duplicate_of TEXT",
+}
+
+
+class SyncStateStore:
+    """
+    SQLite-backed sync state shared by the delta loop and sync workers.
+
+    Keeps, per sync scope (one SharePoint folder -> one blob container):
+      - the delta link of the last completed enumeration
+      - the @odata.nextLink cursor of every page fetched by the current enumeration
+      - per-item eTag/cTag, blob key, size and last sync time, so "what's in blob"
+        questions are answered locally without listing the container
+      - per-item content hash and, for deduplicated copies, the blob key holding the content
+      - whether the item records were seeded from a listing of the blobs already in the
+        container, after which a missing record means there is no blob to compare against
+      - items that failed to sync, with their attempt count, retried by id on later runs
+      - files/bytes/duration of past runs, used to estimate how long a planned sync will take
+
+    One connection is shared across threads and guarded by a lock; every write
+    is committed immediately so a crash loses at most the in-flight items.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+            columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(items)")}
+            for column, statement in ITEM_MIGRATIONS.items():
+                if column not in columns:
+                    self._conn.execute(statement)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_items_content_hash ON items (scope, content_hash)")
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _execute(self, sql: str, params: tuple = ()) -> None:
+        with self._lock:
+            self._conn.execute(sql, params)
+            self._conn.commit()
+
+    def _fetchone(self, sql: str, params: tuple = ()) -> Optional[sqlite3.Row]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchone()
+
+    # ------------------------ DELTA LINKS ------------------------
+    def get_delta_link(self, scope: str) -> Optional[str]:
+        """Return the saved delta link for scope, if a previous enumeration completed."""
+        row = self._fetchone("SELECT delta_link FROM delta_links WHERE scope = ?", (scope,))
+        return row["delta_link"] if row else None
+
+    def save_delta_link(self, scope: str, delta_link: str) -> None:
+        """Save the final delta link and drop the page cursors of the finished enumeration."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO delta_links (scope, delta_link, updated_at) VALUES (?, ?, ?)",
+                (scope, delta_link, time.time())
+            )
+            self._conn.execute("DELETE FROM page_cursors WHERE scope = ?", (scope,))
+            self._conn.commit()
+
+    def import_json_state(self, scope: str, json_path: str) -> bool:
+        """Import the delta link from a legacy delta_state.json if scope has none yet."""
+        if not os.path.exists(json_path) or self.get_delta_link(scope):
+            return False
+        try:
+            with open(json_path, 'r') as f:
+                delta_url = json.load(f).get("delta_url")
+        except (json.JSONDecodeError, IOError) as e:
+            logger.warning(f"Failed to read legacy delta state {json_path}: {e}")
+            return False
+        if not delta_url:
+            return False
+        self.save_delta_link(scope, delta_url)
+        logger.info(f"Imported delta link from {json_path} into {self.path}")
+        return True
+
+    # ------------------------ PAGE CURSORS ------------------------
+    def record_page(self, scope: str, page: int, page_url: str, next_link: Optional[str]) -> None:
+        """Record a fetched delta page and the cursor pointing at the page after it."""
+        self._execute(
+            "INSERT OR REPLACE INTO page_cursors (scope, page, page_url, next_link, completed, updated_at) "
+            "VALUES (?, ?, ?, ?, 0, ?)",
+            (scope, page, page_url, next_link, time.time())
+        )
+
+    def complete_page(self, scope: str, page: int) -> None:
+        """Mark a page as committed: all of its items have been handled."""
+        self._execute(
+            "UPDATE page_cursors SET completed = 1, updated_at = ? WHERE scope = ? AND page = ?",
+            (time.time(), scope, page)
+        )
+
+    def get_resume_point(self, scope: str) -> Optional[Tuple[int, str]]:
+        """
+        Return (page, next_link) of the last page committed without gaps before it,
+        or None when there is nothing to resume. Pages complete out of order under the
+        worker pool, so a completed page after an unfinished one is not a safe cursor.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT page, next_link, completed FROM page_cursors WHERE scope = ? ORDER BY page",
+                (scope,)
+            ).fetchall()
+        resume = None
+        for row in rows:
+            if not row["completed"]:
+                break
+            resume = (row["page"], row["next_link"])
+        if resume and resume[1]:
+            return resume
+        return None
+
+    def clear_pages(self, scope: str, after_page: int = 0) -> None:
+        """Forget page cursors for scope beyond after_page (all of them by default)."""
+        self._execute("DELETE FROM page_cursors WHERE scope = ? AND page > ?", (scope, after_page))
+
+    def clear_delta_state(self, scope: str) -> None:
+        """Forget the delta link and page cursors of scope so the next enumeration starts over."""
+        with self._lock:
+            self._conn.execute("DELETE FROM delta_links WHERE scope = ?", (scope,))
+            self._conn.execute("DELETE FROM page_cursors WHERE scope = ?", (scope,))
+            self._conn.commit()
+
+    # ------------------------ ITEMS ------------------------
+    def get_item(self, scope: str, item_id: str) -> Optional[Dict[str, Any]]:
+        row = self._fetchone("SELECT * FROM items WHERE scope = ? AND item_id = ?", (scope, item_id))
+        return dict(row) if row else None
+
+    def upsert_item(self, scope: str, item_id: str, drive_id: str, blob_key: str,
+                    etag: str, ctag: str, size: Optional[int],
+                    content_hash: Optional[str] = None, duplicate_of: Optional[str] = None) -> None:
+        """Record that item_id is stored at blob_key with the given content version."""
+        self._execute(
+            "INSERT OR REPLACE INTO items "
+            "(scope, item_id, drive_id, blob_key, etag, ctag, size, synced_at, content_hash, duplicate_of) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (scope, item_id, drive_id, blob_key, etag, ctag, size, time.time(), content_hash, duplicate_of)
+        )
+    
+    def is_seeded(self, scope: str) -> bool:
+        """Return whether scope's item records were seeded from the container's existing blobs."""
+        return self._fetchone("SELECT 1 FROM seeded_scopes WHERE scope = ?", (scope,)) is not None
+
+    def seed_items(self, scope: str, items: List[Tuple]) -> None:
+        """
+        Insert records for blobs found in the container, keeping records that already exist,
+        and mark scope as seeded. items holds (item_id, drive_id, blob_key, etag, ctag, size,
+        content_hash, duplicate_of) tuples; everything is written in one transaction.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO items "
+                "(scope, item_id, drive_id, blob_key, etag, ctag, size, synced_at, content_hash, duplicate_of) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(scope, *item[:6], now, *item[6:]) for item in items]
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO seeded_scopes (scope, seeded_at) VALUES (?, ?)", (scope, now)
+            )
+            self._conn.commit()
+    
+    def find_canonical_item(self, scope: str, content_hash: str, exclude_item_id: str) -> Optional[Dict[str, Any]]:
+        """Return another item of scope whose blob holds the full content with this hash."""
+        row = self._fetchone(
+            "SELECT * FROM items WHERE scope = ? AND content_hash = ? AND duplicate_of IS NULL AND item_id != ? "
+            "ORDER BY synced_at LIMIT 1",
+            (scope, content_hash, exclude_item_id)
+        )
+        return dict(row) if row else None
+    
+    def get_duplicates(self, scope: str, blob_key: str) -> List[Dict[str, Any]]:
+        """Return the items stored as references to blob_key."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM items WHERE scope = ? AND duplicate_of = ? ORDER BY synced_at",
+                (scope, blob_key)
+            ).fetchall()
+        return [dict(row) for row in rows]
+    
+    def set_duplicate_of(self, scope: str, item_id: str, duplicate_of: Optional[str]) -> None:
+        self._execute(
+            "UPDATE items SET duplicate_of = ? WHERE scope = ? AND item_id = ?",
+            (duplicate_of, scope, item_id)
+        )
+
+    def delete_item(self, scope: str, item_id: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM items WHERE scope = ? AND item_id = ?", (scope, item_id))
+            self._conn.execute("DELETE FROM failed_items WHERE scope = ? AND item_id = ?", (scope, item_id))
+            self._conn.commit()
+
+    # ------------------------ FAILED ITEMS ------------------------
+    def record_failed_item(self, scope: str, item_id: str, drive_id: Optional[str], error: str) -> int:
+        """Record a failed attempt to sync item_id and return how many attempts have failed so far."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO failed_items (scope, item_id, drive_id, attempts, last_error, updated_at) "
+                "VALUES (?, ?, ?, 1, ?, ?) "
+                "ON CONFLICT (scope, item_id) DO UPDATE SET attempts = attempts + 1, "
+                "last_error = excluded.last_error, updated_at = excluded.updated_at",
+                (scope, item_id, drive_id, error, time.time())
+            )
+            self._conn.commit()
+            row = self._conn.execute(
+                "SELECT attempts FROM failed_items WHERE scope = ? AND item_id = ?", (scope, item_id)
+            ).fetchone()
+        return row["attempts"]
+
+    def get_failed_items(self, scope: str) -> List[Dict[str, Any]]:
+        """Return the items of scope still waiting for a successful sync, oldest failure first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM failed_items WHERE scope = ? ORDER BY updated_at", (scope,)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def clear_failed_item(self, scope: str, item_id: str) -> None:
+        self._execute("DELETE FROM failed_items WHERE scope = ? AND item_id = ?", (scope, item_id))
+
+    # ------------------------ RUN HISTORY ------------------------
+    def record_run(self, scope: str, started_at: float, duration: float, files: int, num_bytes: int) -> None:
+        """Record what a finished sync run transferred and how long it took."""
+        self._execute(
+            "INSERT INTO sync_runs (scope, started_at, duration, files, bytes) VALUES (?, ?, ?, ?, ?)",
+            (scope, started_at, duration, files, num_bytes)
+        )
+    
+    def get_throughput(self, limit: int = 20) -> Optional[Dict[str, float]]:
+        """
+        Return files/s and bytes/s aggregated over the most recent runs that moved data,
+        across all scopes (a library that was never synced has no history of its own).
+        """
+        row = self._fetchone(
+            "SELECT COUNT(*) AS runs, SUM(files) AS files, SUM(bytes) AS bytes, SUM(duration) AS duration "
+            "FROM (SELECT * FROM sync_runs WHERE files > 0 AND duration > 0 ORDER BY started_at DESC LIMIT ?)",
+            (limit,)
+        )
+        if not row["runs"]:
+            return None
+        return {
+            "runs": row["runs"],
+            "files_per_second": row["files"] / row["duration"],
+            "bytes_per_second": row["bytes"] / row["duration"]
+        }
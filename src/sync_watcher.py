@@ -0,0 +1,222 @@
+import re
+import json
+import time
+import queue
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+from src.sharepoint_sync import SharePointSync, SyncTarget
+
+logger = logging.getLogger(__name__)
+
+# Queued in place of a drive id to sync every target
+ALL_TARGETS = "*"
+
+
+class SyncWatcher:
+    """
+    Keeps one SharePointSync instance (token, refresher, Graph connection pool,
+    state store) alive and re-runs incremental syncs from the saved delta links.
+
+    Polling is adaptive: after a cycle that changed something the next poll
+    comes min_interval later; every idle cycle doubles the wait up to
+    max_interval. notify() wakes the loop immediately (for Graph change
+    notifications relayed by WatchNotificationServer or any other local
+    producer), limited to the targets on the notified drive.
+
+    on_changes receives {target name: summary} of the targets that changed in a
+    cycle; cycles without changes never call it.
+    """
+
+    def __init__(self, sp_sync: SharePointSync, targets: Optional[List[SyncTarget]] = None,
+                 min_interval: Optional[float] = None, max_interval: Optional[float] = None,
+                 concurrency: Optional[int] = None,
+                 on_changes: Optional[Callable[[Dict[str, Dict[str, Any]]], None]] = None):
+        self.sp_sync = sp_sync
+        self.targets = targets or [sp_sync.default_target]
+        self.min_interval = max(1.0, min_interval or sp_sync.config.watch_min_interval_seconds)
+        self.max_interval = max(self.min_interval, max_interval or sp_sync.config.watch_max_interval_seconds)
+        self.concurrency = concurrency
+        self.on_changes = on_changes
+        self.interval = self.min_interval
+        self.cycles = 0
+        # Target name -> drive id its delta feed reads (ALL_TARGETS when unknown)
+        self._drive_ids: Dict[str, str] = {}
+        self._events: "queue.Queue[Optional[str]]" = queue.Queue()
+
+    def notify(self, drive_id: Optional[str] = None) -> None:
+        """Request an immediate sync of the targets on drive_id (all targets if None)."""
+        self._events.put(drive_id or ALL_TARGETS)
+
+    def stop(self) -> None:
+        self._events.put(None)
+
+    def _resolve_drive_ids(self) -> None:
+        """Look up the drive each target reads, so notifications name the drives we compare against."""
+        for target in self.targets:
+            try:
+                self._drive_ids[target.name] = self.sp_sync.resolve_drive_id(target)
+            except Exception as e:
+                # Better a few extra syncs than silently missing this target's changes
+                logger.warning(f"Could not resolve the drive of target {target.name}; "
+                               f"syncing it on every notification: {e}")
+                self._drive_ids[target.name] = ALL_TARGETS
+
+    def _targets_for(self, drive_ids: set) -> List[SyncTarget]:
+        if ALL_TARGETS in drive_ids:
+            return list(self.targets)
+        return [
+            target for target in self.targets
+            if self._drive_ids.get(target.name, ALL_TARGETS) in drive_ids | {ALL_TARGETS}
+        ]
+
+    def run_cycle(self, targets: Optional[List[SyncTarget]] = None) -> Dict[str, Dict[str, Any]]:
+        """Run one incremental sync of the given targets (all by default) and return their summaries."""
+        self.cycles += 1
+        # Storage access was checked once when the watch started
+        return self.sp_sync.sync_targets(self.targets if targets is None else targets, self.concurrency,
+                                         check_storage=False)
+
+    def run(self, max_cycles: Optional[int] = None) -> None:
+        """Sync, wait, repeat until stop() is called (or max_cycles have run)."""
+        self.sp_sync.check_storage_access(self.targets)
+        self._resolve_drive_ids()
+        logger.info(f"👀 Watching {len(self.targets)} target(s) for changes "
+                    f"(poll every {self.min_interval:.0f}-{self.max_interval:.0f}s)")
+
+        drive_ids = {ALL_TARGETS}
+        next_poll = time.monotonic()
+        while max_cycles is None or self.cycles < max_cycles:
+            targets = self._targets_for(drive_ids)
+            if targets:
+                self._cycle(targets)
+                next_poll = time.monotonic() + self.interval
+            else:
+                # Keep the poll schedule: unrelated notifications must not postpone it
+                logger.info("🔕 Notified drive is not read by any target; nothing to sync")
+
+            if max_cycles is not None and self.cycles >= max_cycles:
+                break
+            drive_ids = self._wait(max(0.0, next_poll - time.monotonic()))
+            if drive_ids is None:
+                break
+        logger.info(f"Watch stopped after {self.cycles} cycles")
+
+    def _cycle(self, targets: List[SyncTarget]) -> None:
+        """Sync targets once, report what changed and adapt the poll interval."""
+        changed = {}
+        try:
+            summaries = self.run_cycle(targets)
+            changed = {name: summary for name, summary in summaries.items() if summary["changed_files"]}
+        except Exception as e:
+            # A daemon outlives transient failures; the next cycle retries from the same delta link
+            logger.error(f"Watch cycle failed: {e}")
+
+        if changed:
+            self.interval = self.min_interval
+            described = ", ".join(f"{name} ({summary['changed_files']})" for name, summary in changed.items())
+            logger.info(f"🔄 Changes in {described}")
+            if self.on_changes:
+                try:
+                    self.on_changes(changed)
+                except Exception as e:
+                    logger.error(f"Change handler failed: {e}")
+        else:
+            self.interval = min(self.max_interval, self.interval * 2)
+
+    def _wait(self, timeout: float) -> Optional[set]:
+        """Block until the poll interval elapses or notifications arrive; None means stop."""
+        try:
+            event = self._events.get(timeout=timeout)
+        except queue.Empty:
+            return {ALL_TARGETS}
+        events = [event]
+        # Notifications tend to arrive in bursts; take everything queued in one cycle
+        while True:
+            try:
+                events.append(self._events.get_nowait())
+            except queue.Empty:
+                break
+        if None in events:
+            return None
+        logger.info(f"🔔 Woken by {len(events)} change notification(s)")
+        return set(events)
+
+
+class WatchNotificationServer:
+    """
+    Local HTTP endpoint for Graph change notifications on drives, forwarded by a
+    relay (or exposed through a reverse proxy) to http://127.0.0.1:<port>/.
+
+    Answers the subscription validation handshake, checks clientState when one
+    is configured and wakes the watcher for the notified drive. Creating and
+    renewing the Graph subscription is left to whoever owns the public URL.
+    """
+
+    DRIVE_RESOURCE = re.compile(r"drives/([^/]+)")
+
+    def __init__(self, watcher: SyncWatcher, port: int, client_state: str = "", host: str = "127.0.0.1"):
+        self.watcher = watcher
+        self.client_state = client_state
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    def start(self) -> "WatchNotificationServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="watch-notify", daemon=True)
+        self._thread.start()
+        logger.info(f"Listening for change notifications on http://127.0.0.1:{self.port}/")
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def handle_notifications(self, payload: Dict[str, Any]) -> int:
+        """Wake the watcher for every valid notification in a Graph payload. Returns how many were accepted."""
+        accepted = 0
+        for notification in payload.get("value", []):
+            if self.client_state and notification.get("clientState") != self.client_state:
+                logger.warning("Ignoring change notification with unexpected clientState")
+                continue
+            match = self.DRIVE_RESOURCE.search(notification.get("resource", ""))
+            self.watcher.notify(match.group(1) if match else None)
+            accepted += 1
+        return accepted
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _reply(self, status: int, body: bytes = b"", content_type: str = "text/plain") -> None:
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                # Subscription validation: echo the token back as plain text within 10 seconds
+                token = parse_qs(urlparse(self.path).query).get("validationToken")
+                if token:
+                    self._reply(200, token[0].encode("utf-8"))
+                    return
+                try:
+                    length = int(self.headers.get("Content-Length", 0))
+                    payload = json.loads(self.rfile.read(length) or b"{}")
+                except (ValueError, json.JSONDecodeError):
+                    self._reply(400, b"invalid notification payload")
+                    return
+                server.handle_notifications(payload)
+                self._reply(202)
+
+        return Handler
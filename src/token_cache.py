@@ -0,0 +1,175 @@
+import os
+import base64
+import logging
+import tempfile
+import threading
+import webbrowser
+from typing import Any, Dict, List, Optional
+import msal
+from config.settings import config
+
+logger = logging.getLogger(__name__)
+
+# Encrypted cache files start with this header followed by the key-derivation salt
+ENCRYPTED_HEADER = b"SPTC1"
+SALT_BYTES = 16
+PBKDF2_ITERATIONS = 390000
+
+
+class PersistentTokenCache(msal.SerializableTokenCache):
+    """
+    MSAL token cache persisted to a local file shared by every command and script.
+
+    The file is written atomically with 0600 permissions whenever MSAL reports
+    a change, and re-read before each lookup if another process has replaced it,
+    so `sync` followed by `explore_documents.py` reuses the same access/refresh
+    tokens instead of starting a new device-code flow. When a passphrase is
+    given the file is Fernet-encrypted with a key derived from it through
+    PBKDF2-HMAC-SHA256 and a random salt stored at the start of the file.
+    """
+
+    def __init__(self, path: str, passphrase: str = ""):
+        super().__init__()
+        self.path = os.path.expanduser(path)
+        self._passphrase = passphrase
+        self._salt = os.urandom(SALT_BYTES)
+        self._fernet = self._build_fernet(passphrase, self._salt) if passphrase else None
+        self._file_lock = threading.Lock()
+        self._loaded_mtime = None
+        self.reload()
+
+    @staticmethod
+    def _build_fernet(passphrase: str, salt: bytes):
+        # cryptography is already installed as a dependency of msal
+        from cryptography.fernet import Fernet
+        from cryptography.hazmat.primitives import hashes
+        from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+        kdf = PBKDF2HMAC(algorithm=hashes.SHA256(), length=32, salt=salt, iterations=PBKDF2_ITERATIONS)
+        return Fernet(base64.urlsafe_b64encode(kdf.derive(passphrase.encode("utf-8"))))
+
+    def _decrypt(self, data: bytes) -> bytes:
+        if not data.startswith(ENCRYPTED_HEADER):
+            raise ValueError("not an encrypted token cache")
+        salt = data[len(ENCRYPTED_HEADER):len(ENCRYPTED_HEADER) + SALT_BYTES]
+        if salt != self._salt:
+            # Adopt the file's salt so later saves keep a key other processes can derive
+            self._fernet = self._build_fernet(self._passphrase, salt)
+            self._salt = salt
+        return self._fernet.decrypt(data[len(ENCRYPTED_HEADER) + SALT_BYTES:])
+
+    def reload(self) -> None:
+        """Load the file if it changed on disk since it was last read."""
+        with self._file_lock:
+            try:
+                mtime = os.path.getmtime(self.path)
+            except OSError:
+                return
+            # Never drop tokens this process acquired but has not saved yet
+            if mtime == self._loaded_mtime or self.has_state_changed:
+                return
+            try:
+                with open(self.path, "rb") as f:
+                    data = f.read()
+                if self._fernet:
+                    data = self._decrypt(data)
+                self.deserialize(data.decode("utf-8"))
+                self._loaded_mtime = mtime
+            except Exception as e:
+                # A corrupt or undecryptable cache only costs a fresh sign-in
+                logger.warning(f"Ignoring unreadable token cache {self.path}: {e}")
+
+    def save(self) -> None:
+        """Write the cache back to disk if MSAL changed it."""
+        with self._file_lock:
+            if not self.has_state_changed:
+                return
+            data = self.serialize().encode("utf-8")
+            if self._fernet:
+                data = ENCRYPTED_HEADER + self._salt + self._fernet.encrypt(data)
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            # mkstemp creates the file with 0600 permissions
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".token_cache.")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                logger.warning(f"Failed to persist token cache {self.path}: {e}")
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                return
+            self.has_state_changed = False
+            self._loaded_mtime = os.path.getmtime(self.path)
+
+    def find(self, credential_type, **kwargs):
+        # Pick up tokens another process wrote since this one started
+        self.reload()
+        return super().find(credential_type, **kwargs)
+
+
+def load_token_cache(path: Optional[str] = None, passphrase: Optional[str] = None) -> Optional[PersistentTokenCache]:
+    """Return the shared token cache, or None when TOKEN_CACHE_FILE is empty (caching disabled)."""
+    path = config.token_cache_file if path is None else path
+    if not path:
+        return None
+    return PersistentTokenCache(path, config.token_cache_key if passphrase is None else passphrase)
+
+
+def acquire_token_silent(app: msal.ClientApplication, scopes: List[str],
+                         force_refresh: bool = False) -> Optional[Dict[str, Any]]:
+    """
+    Return a cached or silently refreshed token for the first signed-in account, if any.
+    With force_refresh the refresh token is redeemed even if the cached access token is still valid.
+    """
+    for account in app.get_accounts():
+        result = app.acquire_token_silent(scopes, account=account, force_refresh=force_refresh)
+        if result and "access_token" in result:
+            return result
+    return None
+
+
+def get_device_code_token(client_id: str, tenant_id: str, scopes: List[str]) -> Optional[Dict[str, Any]]:
+    """
+    Sign in a user for the helper scripts: reuse the shared cache silently, else run the device code flow.
+
+    The cache is saved on both paths, so a silently refreshed token is written back too.
+    Returns the MSAL result with an access_token, or None when sign-in failed.
+    """
+    token_cache = load_token_cache()
+    app = msal.PublicClientApplication(
+        client_id=client_id,
+        authority=f"https://login.microsoftonline.com/{tenant_id}",
+        enable_pii_log=False,
+        token_cache=token_cache
+    )
+
+    # Reuse the sign-in from a previous command if the shared cache has one
+    result = acquire_token_silent(app, scopes)
+    if result:
+        if token_cache:
+            token_cache.save()
+        print("✅ Using cached sign-in")
+        return result
+
+    flow = app.initiate_device_flow(scopes=scopes)
+    if "user_code" not in flow:
+        print(f"Failed to create device flow: {flow}")
+        return None
+
+    print(f"{flow['message']}")
+
+    # Auto-open browser
+    if 'verification_uri' in flow:
+        print(f"Opening browser...")
+        webbrowser.open(flow['verification_uri'])
+
+    result = app.acquire_token_by_device_flow(flow)
+    if token_cache:
+        token_cache.save()
+
+    if "access_token" in result:
+        print("✅ Authentication successful!")
+        return result
+    print(f"❌ Authentication failed: {result.get('error_description')}")
+    return None